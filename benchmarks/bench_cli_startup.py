@@ -0,0 +1,55 @@
+"""
+Measures cold start time of the wordlebot CLI: a fresh interpreter importing
+solver.solver_cli and producing the recommendation after the first guess.
+
+    python benchmarks/bench_cli_startup.py [--repeats N] [--max-seconds S]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each snippet runs in its own interpreter, so every run is a cold start
+SNIPPETS = {
+    'import': 'import solver.solver_cli',
+    'first_recommendation': (
+        'import solver.solver_cli as cli\n'
+        'hidden_words, _ = cli.get_word_lists()\n'
+        'feedback = cli.convert_feedback_to_tuple("bbybb")\n'
+        'possible_words = cli.filter_vocab_on_guess_and_assessment(hidden_words, "tarse", feedback)\n'
+        'cli.recommend(possible_words)\n'
+    ),
+}
+
+
+def time_snippet(snippet):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', snippet], cwd=REPO_ROOT, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--max-seconds', type=float, default=1.0,
+                        help='Fail if the median first recommendation takes longer than this')
+    args = parser.parse_args()
+
+    medians = {}
+    for name, snippet in SNIPPETS.items():
+        timings = [time_snippet(snippet) for _ in range(args.repeats)]
+        medians[name] = statistics.median(timings)
+        print(f'{name}: median {medians[name]:.3f}s, min {min(timings):.3f}s, max {max(timings):.3f}s')
+
+    if medians['first_recommendation'] > args.max_seconds:
+        print(f'FAIL: first recommendation took longer than {args.max_seconds}s')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
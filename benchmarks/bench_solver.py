@@ -0,0 +1,190 @@
+"""
+Micro-benchmarks for the solver hot paths, run at several vocabulary sizes.
+A size of N picks N random hidden words as the possible solutions, and those
+words plus 5 * N other official words as the guesses ("full" uses both word
+lists as they are).
+
+    python benchmarks/bench_solver.py [--sizes 100,300,1000] [--repeats R]
+                                      [--save results.json]
+                                      [--baseline results.json] [--tolerance 0.25]
+
+With --baseline, every metric also present in the baseline file is compared
+to it, and the script fails if any median time is more than `tolerance`
+(relative) slower.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import numpy as np  # noqa: E402
+import solver.information as information  # noqa: E402
+from solver.assess_solver import AssessSolver  # noqa: E402
+from solver.puzzle import Puzzle  # noqa: E402
+from solver.solver import InformationTheorySolver, load_vocab_file  # noqa: E402
+
+# Number of (guess, answer) pairs per assess_guess measurement
+ASSESS_PAIRS = 20000
+# Number of games per single-solve measurement
+SOLVE_GAMES = 20
+
+
+def word_lists(size, seed=0):
+    """(guesses, answers) for a benchmark size"""
+    hidden_words = load_vocab_file(os.path.join(REPO_ROOT, 'solver', 'hidden_words.txt'))
+    official_words = load_vocab_file(os.path.join(REPO_ROOT, 'solver', 'official_words.txt'))
+    if size == 'full':
+        return official_words, hidden_words
+    rng = random.Random(seed)
+    answers = rng.sample(hidden_words, int(size))
+    chosen = set(answers)
+    others = [word for word in official_words if word not in chosen]
+    return answers + rng.sample(others, min(len(others), 5 * int(size))), answers
+
+
+def bench_assess_guess(guesses, answers, tmp_dir):
+    rng = random.Random(0)
+    pairs = [(rng.choice(guesses), rng.choice(answers)) for _ in range(ASSESS_PAIRS)]
+
+    def run():
+        # Time the assessment itself, not cache lookups
+        Puzzle.assessments.attach(None)
+        Puzzle.assessments.clear()
+        for guess, answer in pairs:
+            Puzzle.assess_guess(guess, answer)
+    return run
+
+
+def bench_compute_pattern_frequencies(guesses, answers, tmp_dir):
+    return lambda: information.compute_pattern_frequencies(guesses, answers)
+
+
+def bench_compute_information_from_frequencies(guesses, answers, tmp_dir):
+    pattern_frequencies = information.compute_pattern_frequencies(guesses, answers)
+    return lambda: information.compute_information_from_frequencies(pattern_frequencies, answers)
+
+
+def _solver(guesses, answers, tmp_dir):
+    return InformationTheorySolver(guesses, answers, cache_dir=tmp_dir)
+
+
+def bench_solver_init(guesses, answers, tmp_dir):
+    return lambda: InformationTheorySolver(guesses, answers,
+                                           cache_path=os.path.join(tmp_dir, f'init_{time.time_ns()}.bin'))
+
+
+def bench_solve(guesses, answers, tmp_dir):
+    info_solver = _solver(guesses, answers, tmp_dir)
+    words = random.Random(0).sample(answers, min(len(answers), SOLVE_GAMES))
+
+    def run():
+        # Each repeat starts from a cold guess cache
+        info_solver._guess_cache.clear()
+        for word in words:
+            info_solver.solve(Puzzle(word=word))
+    return run
+
+
+def bench_assess(guesses, answers, tmp_dir):
+    info_solver = _solver(guesses, answers, tmp_dir)
+
+    def run():
+        info_solver._guess_cache.clear()
+        AssessSolver(answers).assess(info_solver)
+    return run
+
+
+BENCHMARKS = {
+    'assess_guess': bench_assess_guess,
+    'compute_pattern_frequencies': bench_compute_pattern_frequencies,
+    'compute_information_from_frequencies': bench_compute_information_from_frequencies,
+    'solver_init': bench_solver_init,
+    'solve': bench_solve,
+    'assess': bench_assess,
+}
+
+
+def time_benchmark(run, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return {'median': statistics.median(timings), 'min': min(timings), 'repeats': repeats}
+
+
+def run_benchmarks(sizes, names, repeats):
+    """Dictionary of {'name@size': timing} for every benchmark and size"""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            guesses, answers = word_lists(size)
+            for name in names:
+                run = BENCHMARKS[name](guesses, answers, tmp_dir)
+                results[f'{name}@{size}'] = timing = time_benchmark(run, repeats)
+                print(f'{name}@{size} ({len(guesses)} x {len(answers)}): '
+                      f'median {timing["median"]:.4f}s, min {timing["min"]:.4f}s')
+    Puzzle.assessments.attach(None)
+    Puzzle.assessments.clear()
+    return results
+
+
+def find_regressions(results, baseline, tolerance):
+    """List of (metric, baseline median, median) slower than the tolerance allows"""
+    regressions = []
+    for metric, timing in results.items():
+        if metric in baseline and timing['median'] > baseline[metric]['median'] * (1 + tolerance):
+            regressions.append((metric, baseline[metric]['median'], timing['median']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='100,300,1000',
+                        help='Comma separated numbers of possible solutions, or "full"')
+    parser.add_argument('--benchmarks', default=','.join(BENCHMARKS),
+                        help='Comma separated benchmarks to run')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--save', help='Write the results to this JSON file')
+    parser.add_argument('--baseline', help='JSON file of earlier results to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed relative slowdown against the baseline')
+    args = parser.parse_args()
+
+    names = args.benchmarks.split(',')
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f'Unknown benchmarks: {", ".join(unknown)}')
+    results = run_benchmarks(args.sizes.split(','), names, args.repeats)
+
+    if args.save:
+        with open(args.save, 'w') as handle:
+            json.dump({
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'machine': platform.machine(),
+                'results': results,
+            }, handle, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)['results']
+        regressions = find_regressions(results, baseline, args.tolerance)
+        for metric, before, after in regressions:
+            print(f'REGRESSION {metric}: median {before:.4f}s -> {after:.4f}s')
+        if regressions:
+            sys.exit(1)
+        print(f'No regressions beyond {args.tolerance:.0%} against {args.baseline}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Load generator for the solver service (solver/service.py). Plays complete
+games against random hidden words from many concurrent sessions, each on
+its own connection, and reports request throughput and latency percentiles.
+
+Without --unix or --port, a service is started on a temporary Unix socket
+for the duration of the run.
+
+    python benchmarks/load_service.py [--sessions N] [--games G] [--unix PATH | --port PORT]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from solver.puzzle import Puzzle  # noqa: E402
+from solver.solver import load_vocab_file  # noqa: E402
+
+FEEDBACK_LETTERS = {0: 'b', 1: 'y', 2: 'g'}
+
+
+def feedback(guess, answer):
+    return ''.join(FEEDBACK_LETTERS[color.value] for color in Puzzle.assess_guess(guess, answer))
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+async def run_session(connect, answers, latencies):
+    """Plays every game in `answers` over one connection"""
+    reader, writer = await connect()
+    try:
+        for request_id, answer in enumerate(answers):
+            history = []
+            while True:
+                line = json.dumps({'id': request_id, 'history': history}).encode('utf-8') + b'\n'
+                start = time.perf_counter()
+                writer.write(line)
+                await writer.drain()
+                response = json.loads(await reader.readline())
+                latencies.append(time.perf_counter() - start)
+                if 'error' in response:
+                    raise RuntimeError(f'{answer}: {response["error"]}')
+                if response['solved']:
+                    break
+                history.append([response['guess'], feedback(response['guess'], answer)])
+    finally:
+        writer.close()
+
+
+async def run_load(connect, games, latencies):
+    await asyncio.gather(*(run_session(connect, session_games, latencies) for session_games in games))
+
+
+def start_service(unix_path, cache_dir):
+    command = [sys.executable, '-m', 'solver.service', '--unix', unix_path]
+    if cache_dir:
+        command += ['--cache-dir', cache_dir]
+    process = subprocess.Popen(command, cwd=REPO_ROOT)
+    deadline = time.time() + 600
+    while not os.path.exists(unix_path):
+        if process.poll() is not None or time.time() > deadline:
+            raise RuntimeError('Service failed to start.')
+        time.sleep(0.1)
+    return process
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, default=32, help='Concurrent connections')
+    parser.add_argument('--games', type=int, default=20, help='Games played per session')
+    parser.add_argument('--unix', metavar='PATH', help='Unix socket of a running service')
+    parser.add_argument('--port', type=int, help='TCP port of a running service')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--cache-dir', help='Pattern cache directory for a service started by this script')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    hidden_words = load_vocab_file(os.path.join(REPO_ROOT, 'solver', 'hidden_words.txt'))
+    rng = random.Random(args.seed)
+    games = [[rng.choice(hidden_words) for _ in range(args.games)] for _ in range(args.sessions)]
+
+    process = None
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.port is not None:
+            connect = lambda: asyncio.open_connection(args.host, args.port)  # noqa: E731
+        else:
+            unix_path = args.unix
+            if unix_path is None:
+                unix_path = os.path.join(tmp_dir, 'wordlebot.sock')
+                process = start_service(unix_path, args.cache_dir)
+            connect = lambda: asyncio.open_unix_connection(unix_path)  # noqa: E731
+        try:
+            latencies = []
+            start = time.perf_counter()
+            asyncio.run(run_load(connect, games, latencies))
+            elapsed = time.perf_counter() - start
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    num_games = args.sessions * args.games
+    print(f'{num_games} games, {len(latencies)} requests in {elapsed:.2f}s')
+    print(f'throughput: {len(latencies) / elapsed:.1f} requests/s, {num_games / elapsed:.1f} games/s')
+    print(f'latency: mean {statistics.mean(latencies) * 1000:.2f}ms, '
+          f'p50 {percentile(latencies, 0.50) * 1000:.2f}ms, '
+          f'p99 {percentile(latencies, 0.99) * 1000:.2f}ms, '
+          f'max {max(latencies) * 1000:.2f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,63 +1,90 @@
-import pickle
+import argparse
+from functools import partial
+import os
 import random
 from solver import assess_solver
+import solver.pattern_cache
 import solver.solver
+from solver.lookahead_solver import LookaheadSolver
 
 
-def main():
+def main(lookahead_breadth=None, official_words_path='solver/official_words.txt',
+         hidden_words_path='solver/hidden_words.txt', word_length=None, cache_dir=None,
+         hard_mode=False, output='info_theory_guesses.jsonl', resume=False):
     # Reset random seed
     random.seed=42
 
     # Wordle lists were taken from Alex Selby (https://github.com/alex1770)
     # Who, in turn, took them from the NYT front-end
-    official_words_path = 'solver/official_words.txt'
-    hidden_words_path = 'solver/hidden_words.txt'
-    
-    pattern_frequencies_path = 'pattern_frequencies_all_words_hidden_words.pkl'
-    information_path='information_all_words_hidden_words.pkl'
-    
-    all_vocab = solver.solver.load_vocab_file(official_words_path)
-    potential_hidden_words = solver.solver.load_vocab_file(hidden_words_path)
+    all_vocab = solver.solver.load_vocab_file(official_words_path, word_length)
+    potential_hidden_words = solver.solver.load_vocab_file(hidden_words_path, word_length)
+
+    # Memory-mapped pattern matrix/information cache for these word lists,
+    # built on first run
+    cache_path = solver.pattern_cache.cache_path_for(all_vocab, potential_hidden_words, cache_dir)
 
     # Computes top common words - cached info/pattern frequency data
-    info_solver = solver.solver.InformationTheorySolver(all_vocab, potential_hidden_words,
-        pattern_path=pattern_frequencies_path, information_path=information_path)
+    if lookahead_breadth:
+        # Branch and bound search for the fewest expected guesses
+        info_solver = LookaheadSolver(all_vocab, potential_hidden_words, cache_path=cache_path,
+            breadth=lookahead_breadth)
+    else:
+        info_solver = solver.solver.InformationTheorySolver(all_vocab, potential_hidden_words,
+            cache_path=cache_path, hard_mode=hard_mode)
     
+    # Words are solved in parallel; workers share the memory-mapped cache.
+    # Every solved word is appended to the output file as it completes, so
+    # an interrupted run can be picked up again with --resume
     common_assessor = assess_solver.AssessSolver(potential_hidden_words)
-    guesses = common_assessor.assess(info_solver, verbose=True)
-    
-    # Reminder - CHANGE THESE NAMES in the morning
-    with open('info_theory_guesses.pkl', 'wb') as handle:
-        pickle.dump(guesses, handle, protocol=pickle.HIGHEST_PROTOCOL)
-    
-    with open('info_theory_guesses.pkl', 'rb') as handle:
-        f = pickle.load(handle)
-    
+    guesses = common_assessor.assess(info_solver, verbose=True, processes=os.cpu_count(),
+                                     output=output, resume=resume)
+
     # Print longest guess strings
-    print(sorted(f.items(), key=lambda x: len(x[1]))[-40:])
+    print(sorted(guesses.items(), key=lambda x: len(x[1]))[-40:])
 
 
 if __name__ == '__main__':
-    import cProfile
-    cProfile.run('main()')
+    parser = argparse.ArgumentParser()
+    # See benchmarks/bench_solver.py for timings of the individual hot paths
+    parser.add_argument('--profile', action='store_true', help='Run under cProfile')
+    parser.add_argument('--lookahead', type=int, metavar='BREADTH',
+                        help='Assess LookaheadSolver, trying BREADTH guesses per state')
+    parser.add_argument('--official-words', default='solver/official_words.txt')
+    parser.add_argument('--hidden-words', default='solver/hidden_words.txt')
+    parser.add_argument('--word-length', type=int,
+                        help='Only use the words of this length from the word lists')
+    parser.add_argument('--cache-dir', help='Directory of the pattern caches (one per dictionary)')
+    parser.add_argument('--hard-mode', action='store_true',
+                        help='Only make guesses consistent with all the feedback so far')
+    parser.add_argument('--output', default='info_theory_guesses.jsonl',
+                        help='JSON-lines file receiving the guesses of each word as it is solved')
+    parser.add_argument('--resume', action='store_true',
+                        help='Skip the words already in --output instead of starting over')
+    args = parser.parse_args()
+    if args.hard_mode and args.lookahead:
+        parser.error('--hard-mode is only supported by the information solver')
+    run = partial(main, args.lookahead, args.official_words, args.hidden_words, args.word_length,
+                  args.cache_dir, args.hard_mode, args.output, args.resume)
+    if args.profile:
+        import cProfile
+        cProfile.run('run()')
+    else:
+        run()
 
     # Info solver, utilizing two separate word lists:
     # Num guesses on average: 3.608921611087051
     # Num guesses over six: 0
     # Words over six guesses: []
 
-    # IF we wanted to re-generate pattern frequencies/information calculations
-    # official_words_path = 'solver/official_words.txt'
-    # hidden_words_path = 'solver/hidden_words.txt'
-    # vocab = solver.solver.load_vocab_file(official_words_path)
-    # hidden_words = solver.solver.load_vocab_file(hidden_words_path)
-    # pattern_frequencies = information.compute_pattern_frequencies(
-    #     vocab, hidden_words)
-    # information = information.compute_information_from_frequencies(
-    #     pattern_frequencies, vocab)
-
-    # with open('pattern_frequencies_all_words_hidden_words.pkl', 'wb') as handle:
-    #     pickle.dump(pattern_frequencies, handle, protocol=pickle.HIGHEST_PROTOCOL)
-
-    # with open('information_all_words_hidden_words.pkl', 'wb') as handle:
-    #     pickle.dump(information, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    # Hard mode (python main.py --hard-mode):
+    # Num guesses on average: 3.624512776093547
+    # Num guesses over six: 7
+
+    # LookaheadSolver (python main.py --lookahead 3):
+    # Num guesses on average: 3.4235599826764833
+    # With breadth=None and opener='tarse' (exact for that opener, a few minutes):
+    # Num guesses on average: 3.4140320485058466
+
+    # IF we wanted to re-generate pattern frequencies/information calculations,
+    # evict the cache (python -m solver.cache_manager evict --all) and it will
+    # be rebuilt on the next run (this takes a few seconds).
@@ -1,37 +1,256 @@
+import json
+import multiprocessing
+import os
+from collections import Counter
+from solver.hard_mode import HardModeIndex
+from solver.pattern_matrix import assessment_to_code
 from solver.puzzle import Puzzle
 
+# Words per task handed to a worker when results are streamed, so they are
+# written as they complete rather than once per worker
+STREAM_CHUNK_WORDS = 64
+
+# Solver used by pool workers, set once per process by _init_worker, and
+# whether workers record per-turn instrumentation
+_worker_solver = None
+_worker_instrumented = False
+
+
+def _init_worker(solver, instrumented=False):
+    global _worker_solver, _worker_instrumented
+    _worker_solver = solver
+    _worker_instrumented = instrumented
+    Puzzle.assessments.attach(solver.pattern_matrix)
+
+
+def _solve_word(solver, word, instrumented=False):
+    puzzle = Puzzle(word=word)
+    turns = [] if instrumented else None
+    guesses = solver.solve(puzzle, on_turn=turns.append if instrumented else None)
+    return word, guesses, puzzle.get_guess_count(), turns
+
+
+def _solve_lockstep(solver, words):
+    """Same results as _solve_word for every word, from one solve_many call"""
+    puzzles = [Puzzle(word=word) for word in words]
+    return [(word, guesses, puzzle.get_guess_count(), None)
+            for word, puzzle, guesses in zip(words, puzzles, solver.solve_many(puzzles))]
+
+
+def _solve_words(words):
+    if not _worker_instrumented:
+        return _solve_lockstep(_worker_solver, words)
+    return [_solve_word(_worker_solver, word, _worker_instrumented) for word in words]
+
+
+class AssessmentSummary:
+    """
+    Summary statistics of an assessment (average number of guesses, guess
+    distribution and words needing over six guesses), updated one solved
+    word at a time, so it never needs every game in memory.
+    """
+    def __init__(self) -> None:
+        self.num_words = 0
+        self.sum_guesses = 0
+        self.distribution = Counter()
+        self.over_six = []
+
+    def add(self, word, num_guesses):
+        self.num_words += 1
+        self.sum_guesses += num_guesses
+        self.distribution[num_guesses] += 1
+        if num_guesses > 6:
+            self.over_six.append(word)
+
+    @property
+    def average(self):
+        return self.sum_guesses / self.num_words if self.num_words else 0.0
+
+    @classmethod
+    def from_file(cls, path):
+        """Summary of a JSON-lines results file written by AssessSolver.assess"""
+        summary = cls()
+        for record in read_results(path):
+            summary.add(record['word'], record['num_guesses'])
+        return summary
+
+
+def read_results(path):
+    """
+    Yields the records of a JSON-lines results file written by
+    AssessSolver.assess, one per solved word: {"word", "guesses",
+    "num_guesses"}. A last line cut short (by a crash mid-write) is
+    ignored.
+    """
+    with open(path, encoding='utf-8') as handle:
+        for line in handle:
+            if not line.endswith('\n'):
+                break
+            yield json.loads(line)
+
+
+def _valid_length(path):
+    """Length of the prefix of a results file made of complete lines"""
+    with open(path, 'rb') as handle:
+        data = handle.read()
+    return data.rfind(b'\n') + 1
+
+
 class AssessSolver:
     def __init__(self, vocab) -> None:
         self.vocab = vocab
+        self.guess_distribution = Counter()
 
     def _print_if_verbose(self, str, verbose):
         if verbose:
             print(str)
 
-    def assess(self, solver, verbose=False):
+    def _partition(self, solver, processes, words=None):
+        """
+        Splits the vocabulary into one chunk per process. Every game starts
+        with the same guess, so words are grouped by the feedback they give
+        to it: each group shares its later states, which are then only
+        computed by one worker. Groups are dealt out largest first to
+        balance the chunks.
+        """
+        pattern_matrix = solver.pattern_matrix
+        first_guess = solver.next_guess(solver.initial_state())
+        groups = {}
+        for word in self.vocab if words is None else words:
+            if word in pattern_matrix.answer_index:
+                key = int(pattern_matrix.matrix[first_guess, pattern_matrix.answer_index[word]])
+            else:
+                key = None
+            groups.setdefault(key, []).append(word)
+        chunks = [[] for _ in range(processes)]
+        for group in sorted(groups.values(), key=len, reverse=True):
+            min(chunks, key=len).extend(group)
+        return [chunk for chunk in chunks if chunk]
+
+    def _solve_parallel(self, solver, processes, instrumented=False, words=None, chunk_words=None):
+        """
+        Solves every word (or the given words) using a pool of worker
+        processes, yielding results as they complete. The solver is
+        handed to each worker once; a solver loaded from a pattern cache
+        pickles its matrix by file reference, so every worker maps the same
+        read-only file rather than building or copying its own.
+
+        With chunk_words set, each worker's share is handed out in tasks of
+        at most that many words, so results arrive steadily.
+        """
+        chunks = self._partition(solver, processes, words)
+        num_workers = len(chunks)
+        if chunk_words:
+            chunks = [chunk[start:start + chunk_words]
+                      for chunk in chunks for start in range(0, len(chunk), chunk_words)]
+        with multiprocessing.Pool(num_workers, initializer=_init_worker,
+                                  initargs=(solver, instrumented)) as pool:
+            for results in pool.imap_unordered(_solve_words, chunks):
+                yield from results
+
+    def _check_hard_mode(self, solver, all_guesses):
+        """Raises a ValueError if any game made a guess breaking the hard-mode rules"""
+        index = solver.hard_mode_index or HardModeIndex(solver.pattern_matrix.guesses)
+        guess_index = solver.pattern_matrix.guess_index
+        for word, guesses in all_guesses.items():
+            history = []
+            for guess in guesses:
+                if not index.is_legal(guess_index[guess], history):
+                    raise ValueError(f'Guess {guess!r} breaks hard mode in the game of {word!r} '
+                                     f'({guesses}).')
+                history.append((guess_index[guess], assessment_to_code(Puzzle.assess_guess(guess, word))))
+
+    def assess(self, solver, verbose=False, processes=1, instrumentation=None, hard_mode=None,
+               output=None, resume=False):
         """
         Assesses a solver's performance on the vocabulary (must be a subset
-        of the solver's vocabulary)
+        of the solver's vocabulary). If processes > 1, words are solved in
+        parallel by that many worker processes; results are identical to a
+        serial run.
+
+        If instrumentation (a solver.instrumentation.SolveStats) is given,
+        the turns of every game solved by this call are added to it, in
+        vocabulary order.
+
+        With hard_mode set (by default, when the solver plays in hard mode),
+        every game is checked to follow the hard-mode rules, and a
+        ValueError is raised if one does not.
+
+        With output (a path) given, one JSON-lines record is appended to it
+        as each word is solved (see read_results), so an interrupted run
+        loses nothing already written. With resume set, the words already
+        in the file are not solved again (the file must come from the same
+        solver and settings); otherwise the file is started over. Summary
+        statistics are updated one record at a time, see AssessmentSummary.
+
+        Returns a dictionary of {word: guesses}, in vocabulary order.
         """
-        sum_guesses = 0
-        guesses_over_six = []
+        if hard_mode is None:
+            hard_mode = solver.hard_mode
+        instrumented = instrumentation is not None
         all_guesses = {}
-        for word in self.vocab:
-            puzzle = Puzzle(word=word)
-            self._print_if_verbose(f'Word: {word}', verbose)
-            guesses = solver.solve(puzzle)
-            all_guesses[word] = guesses
-            self._print_if_verbose(f'Guesses: {guesses}', verbose)
-            num_guesses = puzzle.get_guess_count()
-            sum_guesses += num_guesses
-            if num_guesses > 6:
-                self._print_if_verbose(f'*******{word} over 6 guesses!*******', verbose)
-                guesses_over_six.append(word)
-            
-        avg_guess_count = sum_guesses / len(self.vocab)
-        self._print_if_verbose(f'Num guesses on average: {sum_guesses / len(self.vocab)}', verbose)
-        self._print_if_verbose(f'Num guesses over six: {len(guesses_over_six)}', verbose)
-        self._print_if_verbose(f'Words over six guesses: {guesses_over_six}', verbose)
-
-        # Return average num guesses
-        return all_guesses
\ No newline at end of file
+        summary = AssessmentSummary()
+        handle = None
+        if output is not None:
+            if resume and os.path.exists(output):
+                vocab = set(self.vocab)
+                for record in read_results(output):
+                    if record['word'] in vocab and record['word'] not in all_guesses:
+                        all_guesses[record['word']] = record['guesses']
+                        summary.add(record['word'], record['num_guesses'])
+                # Drop a last line cut short, then append after the complete ones
+                handle = open(output, 'r+', encoding='utf-8')
+                handle.truncate(_valid_length(output))
+                handle.seek(0, os.SEEK_END)
+                self._print_if_verbose(f'Resuming: {summary.num_words} words already solved', verbose)
+            else:
+                handle = open(output, 'w', encoding='utf-8')
+        words = [word for word in self.vocab if word not in all_guesses]
+        turns_by_word = {}
+
+        # Score puzzles straight from the solver's matrix rather than
+        # filling the assessment cache with every game's guesses, only for
+        # as long as the assessment runs
+        attached = Puzzle.assessments.pattern_matrix
+        Puzzle.assessments.attach(solver.pattern_matrix)
+        try:
+            if processes > 1 and words:
+                results = self._solve_parallel(solver, processes, instrumented, words,
+                                               STREAM_CHUNK_WORDS if handle else None)
+            elif instrumented or handle is not None:
+                # One game at a time, so turns are timed per game and results
+                # are written as each word is solved
+                results = (_solve_word(solver, word, instrumented) for word in words)
+            else:
+                results = _solve_lockstep(solver, words)
+            for word, guesses, num_guesses, turns in results:
+                if instrumented:
+                    turns_by_word[word] = turns
+                if handle is not None:
+                    handle.write(json.dumps({'word': word, 'guesses': guesses,
+                                             'num_guesses': num_guesses}) + '\n')
+                    handle.flush()
+                self._print_if_verbose(f'Word: {word}', verbose)
+                self._print_if_verbose(f'Guesses: {guesses}', verbose)
+                all_guesses[word] = guesses
+                summary.add(word, num_guesses)
+                if num_guesses > 6:
+                    self._print_if_verbose(f'*******{word} over 6 guesses!*******', verbose)
+        finally:
+            Puzzle.assessments.attach(attached)
+            if handle is not None:
+                handle.close()
+
+        all_guesses = {word: all_guesses[word] for word in self.vocab}
+        if instrumented:
+            for word in words:
+                instrumentation.extend(turns_by_word[word])
+        if hard_mode:
+            self._check_hard_mode(solver, all_guesses)
+        self.summary = summary
+        self.guess_distribution = summary.distribution
+        self._print_if_verbose(f'Num guesses on average: {summary.average}', verbose)
+        self._print_if_verbose(f'Num guesses over six: {len(summary.over_six)}', verbose)
+        self._print_if_verbose(f'Words over six guesses: {summary.over_six}', verbose)
+        self._print_if_verbose(f'Guess distribution: {dict(sorted(summary.distribution.items()))}', verbose)
+        return all_guesses
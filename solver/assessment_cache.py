@@ -0,0 +1,85 @@
+import threading
+from collections import OrderedDict
+
+
+class AssessmentCache:
+    """
+    Cache of Puzzle.assess_guess results, keyed by (candidate_word,
+    hidden_word). Assessments are stored as integer pattern codes (see
+    solver.pattern_matrix) rather than lists of WordleColor, and the least
+    recently used entries are evicted once max_size entries are held.
+
+    If a PatternMatrix is attached, pairs it covers are looked up in the
+    matrix instead, and never take up space in the cache.
+
+    All methods are safe to call from several threads at once.
+    """
+    def __init__(self, max_size=1 << 18, pattern_matrix=None) -> None:
+        if max_size < 0:
+            raise ValueError('max_size must be non-negative.')
+        self.max_size = max_size
+        self.pattern_matrix = pattern_matrix
+        self._codes = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.matrix_hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._codes)
+
+    def attach(self, pattern_matrix):
+        """Uses `pattern_matrix` (or nothing, if None) as the first lookup"""
+        self.pattern_matrix = pattern_matrix
+
+    def get(self, candidate_word, hidden_word):
+        """Returns the cached pattern code for a pair, or None on a miss"""
+        pattern_matrix = self.pattern_matrix
+        if pattern_matrix is not None:
+            guess_id = pattern_matrix.guess_index.get(candidate_word)
+            answer_id = pattern_matrix.answer_index.get(hidden_word)
+            if guess_id is not None and answer_id is not None:
+                code = int(pattern_matrix.matrix[guess_id, answer_id])
+                with self._lock:
+                    self.matrix_hits += 1
+                return code
+        key = (candidate_word, hidden_word)
+        with self._lock:
+            code = self._codes.get(key)
+            if code is None:
+                self.misses += 1
+                return None
+            self._codes.move_to_end(key)
+            self.hits += 1
+        return code
+
+    def put(self, candidate_word, hidden_word, code):
+        """Stores the pattern code for a pair, evicting the oldest if full"""
+        if not self.max_size:
+            return
+        key = (candidate_word, hidden_word)
+        with self._lock:
+            self._codes[key] = code
+            self._codes.move_to_end(key)
+            while len(self._codes) > self.max_size:
+                self._codes.popitem(last=False)
+
+    def clear(self):
+        """Drops every cached entry and resets the statistics"""
+        with self._lock:
+            self._codes.clear()
+            self.hits = self.matrix_hits = self.misses = 0
+
+    def stats(self):
+        """Dictionary of hit/miss counts and the current size"""
+        with self._lock:
+            hits, matrix_hits, misses, size = self.hits, self.matrix_hits, self.misses, len(self._codes)
+        lookups = hits + matrix_hits + misses
+        return {
+            'size': size,
+            'max_size': self.max_size,
+            'hits': hits,
+            'matrix_hits': matrix_hits,
+            'misses': misses,
+            'hit_rate': (hits + matrix_hits) / lookups if lookups else 0.0,
+        }
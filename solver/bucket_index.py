@@ -0,0 +1,102 @@
+import numpy as np
+import solver.information as information
+from solver.pattern_matrix import num_patterns
+
+# Queries top_k can rank guesses by, and whether higher values are better
+_RANKINGS = {'information': True, 'expected_size': False, 'worst_case': False}
+
+
+class BucketIndex:
+    """
+    How many candidates fall in each feedback pattern, for every guess: a
+    (guesses x patterns) array of bucket sizes, counted straight from an
+    integer pattern table (see solver.pattern_matrix) instead of collecting
+    the words of every bucket in sets, as
+    information.compute_pattern_frequencies does. Over the full word lists,
+    that is 14855 x 243 16-bit counts (7 MB).
+
+    Answers the questions asked of bucket sizes: the histogram and buckets
+    of a guess, and the information, expected bucket size and worst-case
+    bucket size of every guess, or the top few guesses by any of them.
+    Guesses are given as words or as ids (rows).
+    """
+    def __init__(self, guesses, counts) -> None:
+        self.guesses = list(guesses)
+        self.guess_index = {word: idx for idx, word in enumerate(self.guesses)}
+        self.counts = np.asarray(counts)
+        if self.counts.ndim != 2 or len(self.counts) != len(self.guesses):
+            raise ValueError(f'Counts of shape {self.counts.shape} do not match {len(self.guesses)} guesses.')
+        self.num_candidates = int(self.counts[0].sum()) if len(self.counts) else 0
+        self._information = None
+
+    @classmethod
+    def from_codes(cls, guesses, codes, candidate_ids=None, word_length=None):
+        """
+        Index of a (guesses x answers) array of pattern codes, over the
+        answers in candidate_ids (every answer by default)
+        """
+        guesses = list(guesses)
+        if word_length is None:
+            word_length = len(guesses[0]) if guesses else 0
+        if candidate_ids is None:
+            candidate_ids = np.arange(codes.shape[1])
+        patterns = num_patterns(word_length)
+        dtype = np.uint16 if len(candidate_ids) < 1 << 16 else np.uint32
+        counts = np.zeros((len(guesses), patterns), dtype=dtype)
+        for start, _, histogram in information.bucket_histograms(codes, candidate_ids, num_patterns=patterns):
+            counts[start:start + len(histogram)] = histogram
+        return cls(guesses, counts)
+
+    @classmethod
+    def from_pattern_matrix(cls, pattern_matrix, candidate_ids=None, guess_ids=None):
+        """
+        Index of a PatternMatrix, over the answers in candidate_ids (every
+        answer by default), for the guesses in guess_ids (every guess by
+        default)
+        """
+        codes, guesses = pattern_matrix.matrix, pattern_matrix.guesses
+        if guess_ids is not None:
+            guess_ids = np.asarray(guess_ids, dtype=np.intp)
+            codes, guesses = codes[guess_ids], [guesses[idx] for idx in guess_ids]
+        return cls.from_codes(guesses, codes, candidate_ids, pattern_matrix.word_length)
+
+    def _row(self, guess):
+        return self.guess_index[guess] if isinstance(guess, str) else int(guess)
+
+    def histogram(self, guess):
+        """Number of candidates giving each pattern code when guessing `guess`"""
+        return self.counts[self._row(guess)]
+
+    def buckets(self, guess):
+        """[(pattern code, bucket size)] of the non-empty buckets of a guess, largest first"""
+        histogram = self.histogram(guess)
+        codes = np.flatnonzero(histogram)
+        codes = codes[np.argsort(-histogram[codes].astype(np.int64), kind='stable')]
+        return list(zip(codes.tolist(), histogram[codes].tolist()))
+
+    def information(self):
+        """Information of every guess (see information.compute_information)"""
+        if self._information is None:
+            self._information = information.information_from_counts(self.counts)
+        return self._information
+
+    def expected_size(self):
+        """Expected number of candidates left after every guess: sum(c^2) / n over its bucket sizes c"""
+        squares = np.einsum('ij,ij->i', self.counts, self.counts, dtype=np.int64)
+        return squares / self.num_candidates
+
+    def worst_case(self):
+        """Size of the largest bucket of every guess"""
+        return self.counts.max(axis=1)
+
+    def top_k(self, k, by='information'):
+        """
+        [(guess, value)] of the k best guesses by information (highest
+        first), expected_size or worst_case (lowest first); ties go to the
+        earliest guess
+        """
+        if by not in _RANKINGS:
+            raise ValueError(f'Cannot rank guesses by {by!r}, only by {", ".join(_RANKINGS)}.')
+        values = getattr(self, by)()
+        order = np.lexsort((np.arange(len(values)), -values if _RANKINGS[by] else values))[:k]
+        return [(self.guesses[idx], values[idx].item()) for idx in order.tolist()]
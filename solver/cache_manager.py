@@ -0,0 +1,343 @@
+"""
+Manages the directory of pattern caches, one per (guesses, answers) pair of
+word lists, named after a digest of both lists and of the cache and solver
+versions (see pattern_cache.cache_path_for). Missing caches are built on
+demand, under a file lock so parallel processes build each one only once.
+
+    python -m solver.cache_manager list
+    python -m solver.cache_manager verify [--deep]
+    python -m solver.cache_manager evict [--all | --invalid | --max-bytes N | --older-than DAYS]
+    python -m solver.cache_manager update --official-words FILE --hidden-words FILE [--from CACHE]
+"""
+import argparse
+import contextlib
+import glob
+import os
+import time
+import numpy as np
+import solver.information as information
+import solver.pattern_cache as pattern_cache
+from solver.pattern_matrix import PatternMatrix, compute_pattern_matrix, pattern_dtype
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """
+    Holds an exclusive lock on `path`.lock (created if needed) while the
+    block runs, blocking until no other process holds it. Lock files are
+    never deleted: a process opening a deleted lock file's path would
+    create and lock a new file while another still holds the old one.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(f'{path}.lock', 'a+b') as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def ensure_pattern_cache(path, guesses, answers):
+    """
+    Builds the pattern cache (and information over every answer) of a pair
+    of word lists at `path`, unless it exists. Processes asking for the same
+    missing cache at the same time wait for the first one to build it.
+    Existing caches are marked as used (see CacheManager.evict).
+    """
+    if not os.path.exists(path):
+        with file_lock(path):
+            if not os.path.exists(path):
+                pattern_matrix = PatternMatrix(guesses, answers)
+                word_information = information.compute_information(
+                    pattern_matrix.matrix, np.arange(len(answers)))
+                pattern_cache.save_pattern_cache(path, pattern_matrix, word_information)
+                return
+    with contextlib.suppress(OSError):
+        os.utime(path)
+
+
+def update_pattern_cache(source_path, path, guesses, answers):
+    """
+    Writes the pattern cache of new word lists at `path`, from the cache of
+    other (overlapping) lists at source_path: the codes of the guesses and
+    answers in both are copied, and only the rows of new guesses and the
+    columns of new answers are computed. The information of the guesses in
+    both is kept while the answers stay the same (in any order); otherwise
+    every guess is scored again over the new answers.
+
+    The source cache is left as it is. Returns a dict counting the
+    copied_cells and computed_cells of the new matrix and the guesses whose
+    information was computed (scored_guesses).
+    """
+    source, source_information = pattern_cache.load_pattern_cache(source_path)
+    guesses, answers = list(guesses), list(answers)
+    word_length = len((guesses or answers)[0]) if guesses or answers else 0
+    if source.word_length != word_length:
+        raise ValueError(f'{source_path} holds words of length {source.word_length}, not {word_length}.')
+    # Row (column) of every guess (answer) in the source, or -1 for new words
+    source_rows = np.array([source.guess_index.get(word, -1) for word in guesses], dtype=np.intp)
+    source_columns = np.array([source.answer_index.get(word, -1) for word in answers], dtype=np.intp)
+    kept_rows, new_rows = np.flatnonzero(source_rows >= 0), np.flatnonzero(source_rows < 0)
+    kept_columns, new_columns = np.flatnonzero(source_columns >= 0), np.flatnonzero(source_columns < 0)
+
+    matrix = np.empty((len(guesses), len(answers)), dtype=pattern_dtype(word_length))
+    if len(kept_rows) and len(kept_columns):
+        # Gathering one axis at a time is much faster than np.ix_; the
+        # columns of new answers are filled from column 0 until computed
+        matrix[kept_rows] = np.asarray(source.matrix).take(np.maximum(source_columns, 0), axis=1) \
+            .take(source_rows[kept_rows], axis=0)
+    if len(new_rows):
+        matrix[new_rows] = compute_pattern_matrix([guesses[row] for row in new_rows], answers)
+    if len(kept_rows) and len(new_columns):
+        matrix[np.ix_(kept_rows, new_columns)] = compute_pattern_matrix(
+            [guesses[row] for row in kept_rows], [answers[column] for column in new_columns])
+
+    same_answers = source_information is not None and not len(new_columns) and \
+        len(answers) == len(source.answers) == len(set(answers))
+    if same_answers:
+        word_information = np.empty(len(guesses))
+        word_information[kept_rows] = source_information[source_rows[kept_rows]]
+        scored_rows = new_rows
+    else:
+        word_information = np.empty(len(guesses))
+        scored_rows = np.arange(len(guesses))
+    if len(scored_rows) and len(answers):
+        word_information[scored_rows] = information.compute_information(
+            matrix, np.arange(len(answers)), scored_rows)
+    pattern_cache.save_pattern_cache(path, PatternMatrix(guesses, answers, matrix),
+                                     word_information if len(answers) else None)
+    return {'copied_cells': len(kept_rows) * len(kept_columns),
+            'computed_cells': matrix.size - len(kept_rows) * len(kept_columns),
+            'scored_guesses': len(scored_rows)}
+
+
+class CacheManager:
+    """
+    A directory of content-addressed pattern caches. get() loads the cache
+    of a pair of word lists, building it first if needed; entries(),
+    verify() and evict() inspect and clean up the directory.
+    """
+    def __init__(self, cache_dir=None) -> None:
+        self.cache_dir = str(cache_dir or pattern_cache.DEFAULT_CACHE_DIR)
+
+    def path_for(self, guesses, answers):
+        return pattern_cache.cache_path_for(guesses, answers, self.cache_dir)
+
+    def get(self, guesses, answers):
+        """(PatternMatrix, information) of a pair of word lists, built if missing"""
+        path = self.path_for(guesses, answers)
+        ensure_pattern_cache(path, guesses, answers)
+        return pattern_cache.load_pattern_cache(path, guesses=guesses, answers=answers)
+
+    def closest(self, guesses, answers):
+        """
+        Path of the readable cache in the directory sharing the most
+        (guess, answer) cells with a pair of word lists, or None if none
+        shares any
+        """
+        guesses, answers = set(guesses), set(answers)
+        best_path, best_shared = None, 0
+        for path in self.paths():
+            try:
+                cached_guesses, cached_answers = pattern_cache.read_cache_words(path)
+            except (OSError, ValueError):
+                continue
+            shared = len(guesses.intersection(cached_guesses)) * len(answers.intersection(cached_answers))
+            if shared > best_shared:
+                best_path, best_shared = path, shared
+        return best_path
+
+    def update(self, guesses, answers, source_path=None):
+        """
+        Makes sure the cache of a pair of word lists exists, deriving it from
+        source_path (by default, the closest cache in the directory) with
+        update_pattern_cache instead of building it from scratch. Returns
+        (path, the counts of update_pattern_cache, or None if the cache
+        existed already).
+        """
+        path = self.path_for(guesses, answers)
+        with file_lock(path):
+            if os.path.exists(path):
+                stats = None
+            else:
+                source_path = source_path or self.closest(guesses, answers)
+                if source_path is None:
+                    pattern_matrix = PatternMatrix(guesses, answers)
+                    word_information = information.compute_information(
+                        pattern_matrix.matrix, np.arange(len(answers)))
+                    pattern_cache.save_pattern_cache(path, pattern_matrix, word_information)
+                    stats = {'copied_cells': 0, 'computed_cells': pattern_matrix.matrix.size,
+                             'scored_guesses': len(guesses)}
+                else:
+                    stats = update_pattern_cache(source_path, path, guesses, answers)
+        return path, stats
+
+    def paths(self):
+        """Paths of every cache file in the directory"""
+        return sorted(glob.glob(os.path.join(glob.escape(self.cache_dir), 'patterns_*.bin')))
+
+    def entries(self):
+        """
+        List of dicts describing every cache file: path, size (bytes),
+        last_used (time of the last build or load), and either word_length,
+        num_guesses and num_answers or, for unreadable files, error
+        """
+        entries = []
+        for path in self.paths():
+            stat = os.stat(path)
+            entry = {'path': path, 'size': stat.st_size, 'last_used': stat.st_mtime}
+            try:
+                header = pattern_cache.read_cache_header(path)
+            except (OSError, ValueError) as error:
+                entry['error'] = str(error)
+            else:
+                entry.update(word_length=header['word_length'], num_guesses=header['num_guesses'],
+                             num_answers=header['num_answers'])
+            entries.append(entry)
+        return entries
+
+    def verify(self, path, deep=False):
+        """
+        List of the problems found with a cache file (empty if none): an
+        unreadable header, word lists not matching their hashes, a name not
+        matching the contents, or a truncated file. With deep set, the
+        matrix and information are also recomputed and compared.
+        """
+        try:
+            header = pattern_cache.read_cache_header(path)
+            guesses, answers = pattern_cache.read_cache_words(path, header)
+        except (OSError, ValueError) as error:
+            return [str(error)]
+        problems = []
+        if pattern_cache.hash_words(guesses) != header['guesses_hash']:
+            problems.append('guess list does not match its hash')
+        if pattern_cache.hash_words(answers) != header['answers_hash']:
+            problems.append('answer list does not match its hash')
+        if os.path.basename(path) != os.path.basename(pattern_cache.cache_path_for(guesses, answers)):
+            problems.append('file name does not match the word lists (or versions) it holds')
+        matrix_end = header['matrix_offset'] + header['num_guesses'] * header['num_answers'] * \
+            np.dtype(pattern_dtype(header['word_length'])).itemsize
+        end = header['information_offset'] + 8 * header['num_guesses'] \
+            if header['information_offset'] else matrix_end
+        if os.path.getsize(path) < max(matrix_end, end):
+            problems.append('file is truncated')
+        if problems or not deep:
+            return problems
+        pattern_matrix, word_information = pattern_cache.load_pattern_cache(path)
+        if not np.array_equal(pattern_matrix.matrix, compute_pattern_matrix(guesses, answers)):
+            problems.append('pattern codes differ from a fresh computation')
+        if word_information is not None and not np.array_equal(
+                word_information, information.compute_information(pattern_matrix.matrix,
+                                                                  np.arange(len(answers)))):
+            problems.append('information differs from a fresh computation')
+        return problems
+
+    def evict(self, everything=False, invalid=False, max_bytes=None, older_than=None):
+        """
+        Deletes cache files, returning their paths: every file, the files
+        failing verify(), the files not used for older_than seconds, and/or
+        the least recently used files until the directory holds at most
+        max_bytes
+        """
+        entries = sorted(self.entries(), key=lambda entry: entry['last_used'])
+        now = time.time()
+        doomed = set()
+        for entry in entries:
+            if everything or (invalid and self.verify(entry['path'])) or \
+                    (older_than is not None and now - entry['last_used'] > older_than):
+                doomed.add(entry['path'])
+        if max_bytes is not None:
+            kept = [entry for entry in entries if entry['path'] not in doomed]
+            total = sum(entry['size'] for entry in kept)
+            for entry in kept:
+                if total <= max_bytes:
+                    break
+                doomed.add(entry['path'])
+                total -= entry['size']
+        removed = []
+        for entry in entries:
+            if entry['path'] in doomed:
+                with file_lock(entry['path']):
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(entry['path'])
+                removed.append(entry['path'])
+        return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cache-dir', default=pattern_cache.DEFAULT_CACHE_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help='List the caches')
+    verify = commands.add_parser('verify', help='Check every cache')
+    verify.add_argument('--deep', action='store_true', help='Also recompute every cache')
+    evict = commands.add_parser('evict', help='Delete caches')
+    evict.add_argument('--all', action='store_true', help='Delete every cache')
+    evict.add_argument('--invalid', action='store_true', help='Delete the caches failing verify')
+    evict.add_argument('--max-bytes', type=int, help='Delete least recently used caches beyond this size')
+    evict.add_argument('--older-than', type=float, metavar='DAYS',
+                       help='Delete caches unused for this many days')
+    update = commands.add_parser('update', help='Derive the cache of edited word lists from an existing one')
+    package_dir = os.path.dirname(__file__)
+    update.add_argument('--official-words', default=os.path.join(package_dir, 'official_words.txt'))
+    update.add_argument('--hidden-words', default=os.path.join(package_dir, 'hidden_words.txt'))
+    update.add_argument('--word-length', type=int)
+    update.add_argument('--from', dest='source', metavar='CACHE',
+                        help='Cache to start from (the closest one in the directory by default)')
+    args = parser.parse_args()
+
+    manager = CacheManager(args.cache_dir)
+    if args.command == 'list':
+        for entry in manager.entries():
+            if 'error' in entry:
+                details = f'unreadable: {entry["error"]}'
+            else:
+                details = f'{entry["word_length"]} letters, {entry["num_guesses"]} guesses x ' \
+                          f'{entry["num_answers"]} answers'
+            print(f'{entry["path"]}\t{entry["size"]} bytes\t'
+                  f'last used {time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["last_used"]))}\t{details}')
+    elif args.command == 'verify':
+        failed = False
+        for path in manager.paths():
+            problems = manager.verify(path, deep=args.deep)
+            failed = failed or bool(problems)
+            print(f'{path}\t{"; ".join(problems) or "ok"}')
+        if failed:
+            raise SystemExit(1)
+    elif args.command == 'update':
+        # Imported here, since the solver itself depends on this module
+        from solver.solver import load_vocab_file
+        guesses = load_vocab_file(args.official_words, args.word_length)
+        answers = load_vocab_file(args.hidden_words, args.word_length)
+        start = time.perf_counter()
+        path, stats = manager.update(guesses, answers, args.source)
+        seconds = time.perf_counter() - start
+        if stats is None:
+            print(f'{path}\talready up to date')
+        else:
+            print(f'{path}\t{stats["copied_cells"]} cells copied, {stats["computed_cells"]} computed, '
+                  f'{stats["scored_guesses"]} guesses scored ({seconds:.2f}s)')
+    else:
+        older_than = None if args.older_than is None else args.older_than * 24 * 60 * 60
+        for path in manager.evict(everything=args.all, invalid=args.invalid, max_bytes=args.max_bytes,
+                                  older_than=older_than):
+            print(f'Removed {path}')
+
+
+if __name__ == '__main__':
+    main()
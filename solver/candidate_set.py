@@ -0,0 +1,69 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+def ids_to_mask(candidate_ids, num_answers):
+    """
+    Bitset of a set of answer ids, as a Python int where bit i is set if
+    answer i is a candidate. Equal sets always give equal ints, whatever
+    the order of the ids, so masks are cheap hashable keys.
+    """
+    bits = np.zeros(num_answers, dtype=np.uint8)
+    bits[np.asarray(candidate_ids, dtype=np.intp)] = 1
+    return int.from_bytes(np.packbits(bits, bitorder='little').tobytes(), 'little')
+
+
+def mask_to_ids(mask, num_answers):
+    """Sorted int32 array of the answer ids set in a bitset"""
+    raw = np.frombuffer(mask.to_bytes((num_answers + 7) // 8, 'little'), dtype=np.uint8)
+    bits = np.unpackbits(raw, count=num_answers, bitorder='little')
+    return np.flatnonzero(bits).astype(np.int32)
+
+
+def full_mask(num_answers):
+    """Bitset holding every answer id"""
+    return (1 << num_answers) - 1
+
+
+class BucketMasks:
+    """
+    Bitsets of the answers in every (guess, feedback) bucket of a
+    PatternMatrix, so narrowing a candidate set is a single AND:
+
+        mask & bucket_masks.mask(guess_id, code)
+
+    Precomputing every bucket of a full matrix would take hundreds of
+    megabytes, so the buckets of a guess are built the first time it is
+    used, and the max_guesses most recently used guesses are kept. The
+    cache is only read and reordered under a lock, and the buckets of a
+    guess are built outside it and never changed, so threads can share the
+    masks (two threads missing the same guess both build the same buckets).
+    """
+    def __init__(self, pattern_matrix, max_guesses=1 << 12) -> None:
+        self.pattern_matrix = pattern_matrix
+        self.max_guesses = max_guesses
+        self._masks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def guess_masks(self, guess_id):
+        """Dictionary of {pattern code: bitset} for every bucket of a guess"""
+        with self._lock:
+            masks = self._masks.get(guess_id)
+            if masks is not None:
+                self._masks.move_to_end(guess_id)
+                return masks
+        row = np.asarray(self.pattern_matrix.matrix[guess_id])
+        codes = np.unique(row)
+        packed = np.packbits(row[None, :] == codes[:, None], axis=1, bitorder='little')
+        masks = {int(code): int.from_bytes(bits.tobytes(), 'little')
+                 for code, bits in zip(codes, packed)}
+        with self._lock:
+            self._masks[guess_id] = masks
+            while len(self._masks) > self.max_guesses:
+                self._masks.popitem(last=False)
+        return masks
+
+    def mask(self, guess_id, code):
+        """Bitset of the answers giving `code` when `guess_id` is guessed"""
+        return self.guess_masks(guess_id).get(code, 0)
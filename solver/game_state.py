@@ -0,0 +1,65 @@
+import numpy as np
+from solver.candidate_set import ids_to_mask, mask_to_ids
+
+
+class GameState:
+    """
+    The state of a game in progress: the answer ids that are still possible
+    and the (guess id, pattern code) pairs played so far. The candidates
+    and history never change; narrow() returns the state after one more
+    guess.
+
+    guess_ids holds the ids of the guesses still worth scoring (None for
+    every guess). It is the one attribute which does change: a solver may
+    replace it with a smaller pool as it scores a state (see
+    InformationBasedSolver.state_information), since a guess which cannot
+    matter for a set of candidates cannot matter for any subset of it
+    either. The guess chosen in a state is the same whatever its pool, and
+    narrowed states inherit the pool of their parent at the time.
+    """
+    __slots__ = ('candidate_ids', 'history', 'guess_ids', '_mask')
+
+    def __init__(self, candidate_ids, history=(), mask=None, guess_ids=None) -> None:
+        self.candidate_ids = np.asarray(candidate_ids, dtype=np.int32)
+        self.history = tuple(history)
+        self.guess_ids = guess_ids
+        self._mask = mask
+
+    @classmethod
+    def from_mask(cls, mask, num_answers, history=()):
+        """State whose candidates are the answer ids set in a bitset"""
+        return cls(mask_to_ids(mask, num_answers), history, mask)
+
+    @property
+    def guessed_ids(self):
+        """Ids of the guesses made so far"""
+        return [guess_id for guess_id, _ in self.history]
+
+    @property
+    def mask(self):
+        """Bitset of the remaining candidates (see solver.candidate_set)"""
+        if self._mask is None:
+            num_answers = int(self.candidate_ids.max()) + 1 if len(self.candidate_ids) else 0
+            self._mask = ids_to_mask(self.candidate_ids, num_answers)
+        return self._mask
+
+    @property
+    def key(self):
+        """
+        Hashable key identifying the remaining candidates: their bitset. Two
+        states reached through different histories share a key if they leave
+        the same words.
+        """
+        return self.mask
+
+    def __len__(self):
+        return len(self.candidate_ids)
+
+    def narrow(self, pattern_matrix, guess_id, code):
+        """
+        Returns the state after guessing `guess_id` and receiving `code`.
+        Only the current candidates are examined, so this costs time
+        proportional to len(self), not to the size of the answer list.
+        """
+        candidate_ids = pattern_matrix.filter_candidates(guess_id, code, self.candidate_ids)
+        return GameState(candidate_ids, self.history + ((guess_id, code),), guess_ids=self.guess_ids)
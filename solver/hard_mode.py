@@ -0,0 +1,94 @@
+import threading
+from collections import Counter
+import numpy as np
+from solver.candidate_set import full_mask, ids_to_mask, mask_to_ids
+from solver.pattern_matrix import code_to_assessment
+from solver.wordle_color import WordleColor
+
+
+class HardModeIndex:
+    """
+    Letter/position index over a list of guesses, answering which guesses
+    are still legal in hard mode, where every guess must be consistent with
+    all the feedback received so far (it could be the answer).
+
+    A guess is consistent with the feedback to an earlier guess exactly
+    when it has the green letters in place, none of the other letters of
+    that guess in place, and, for every letter of that guess, at least as
+    many copies as were green or yellow (exactly as many, if one copy was
+    black). The index holds bitsets (see solver.candidate_set) of the
+    guesses with each letter at each position and of the guesses with at
+    least c copies of each letter, so the legal guesses after one more turn
+    are a few ANDs away from the legal guesses before it. The bitset of
+    every (guess, feedback) pair is built once and reused. That cache is
+    all that changes after construction: entries are only added, under a
+    lock, and are immutable ints, so threads can share an index (two
+    threads missing the same pair both build the same bitset).
+    """
+    def __init__(self, guesses) -> None:
+        self.guesses = list(guesses)
+        self.word_length = len(self.guesses[0]) if self.guesses else 0
+        num_guesses = len(self.guesses)
+        self._all = full_mask(num_guesses)
+        letters = np.array([list(word) for word in self.guesses]).reshape(num_guesses, -1)
+        # {letter: bitset} per position, and {letter: [bitset of at least 1 copy, 2 copies, ...]}
+        self._positions = [{letter: ids_to_mask(np.flatnonzero(letters[:, idx] == letter), num_guesses)
+                            for letter in np.unique(letters[:, idx])}
+                           for idx in range(self.word_length)]
+        self._counts = {}
+        for letter in np.unique(letters):
+            counts = (letters == letter).sum(axis=1)
+            self._counts[letter] = [ids_to_mask(np.flatnonzero(counts >= copies), num_guesses)
+                                    for copies in range(1, int(counts.max()) + 1)]
+        self._constraints = {}
+        self._lock = threading.Lock()
+
+    def _at_least(self, letter, copies):
+        """Bitset of the guesses holding at least `copies` copies of a letter"""
+        if copies <= 0:
+            return self._all
+        counts = self._counts.get(letter, [])
+        return counts[copies - 1] if copies <= len(counts) else 0
+
+    def constraint_mask(self, guess_id, code):
+        """Bitset of the guesses consistent with receiving `code` for `guess_id`"""
+        key = (guess_id, code)
+        mask = self._constraints.get(key)
+        if mask is not None:
+            return mask
+        word = self.guesses[guess_id]
+        mask = self._all
+        found = Counter()
+        black = set()
+        for idx, (letter, color) in enumerate(zip(word, code_to_assessment(code, self.word_length))):
+            in_place = self._positions[idx].get(letter, 0)
+            if color == WordleColor.GREEN:
+                mask &= in_place
+                found[letter] += 1
+            else:
+                mask &= ~in_place
+                if color == WordleColor.YELLOW:
+                    found[letter] += 1
+                else:
+                    black.add(letter)
+        for letter in set(word):
+            mask &= self._at_least(letter, found[letter])
+            if letter in black:
+                mask &= ~self._at_least(letter, found[letter] + 1)
+        with self._lock:
+            self._constraints[key] = mask
+        return mask
+
+    def legal_mask(self, history):
+        """Bitset of the guesses legal after a history of (guess id, code) pairs"""
+        mask = self._all
+        for guess_id, code in history:
+            mask &= self.constraint_mask(guess_id, code)
+        return mask
+
+    def legal_ids(self, history):
+        """Sorted ids of the guesses legal after a history of (guess id, code) pairs"""
+        return mask_to_ids(self.legal_mask(history), len(self.guesses))
+
+    def is_legal(self, guess_id, history):
+        return bool(self.legal_mask(history) >> guess_id & 1)
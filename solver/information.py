@@ -1,7 +1,17 @@
 import math
 import pickle
+import numpy as np
+from solver.pattern_matrix import code_to_assessment
 from solver.puzzle import Puzzle
 
+# Number of (guess, candidate) cells counted per batch in bucket_histograms
+_BLOCK_CELLS = 1 << 16
+# Scale of the fixed point log2 values summed by compute_information
+_FIXED_POINT_SCALE = 1 << 40
+# Largest candidate count distinct_partitions supports: it compares every
+# pair of candidates (one bit per pair, in a uint64)
+_MAX_PAIRWISE_CANDIDATES = 11
+
 
 def compute_pattern_frequencies(original_vocab, subset_vocab, path=None):
     """
@@ -24,14 +34,21 @@ def compute_pattern_frequencies(original_vocab, subset_vocab, path=None):
             pattern_frequencies = pickle.load(handle)
         return pattern_frequencies
     pattern_frequencies = {}
-    for word in original_vocab:
-        pattern_frequencies[word] = {}
-        for other in subset_vocab:
-            assessment = tuple(Puzzle.assess_guess(word, other))
-            if assessment not in pattern_frequencies[word]:
-                pattern_frequencies[word][assessment] = set([other])
+    codes = Puzzle.assess_matrix(original_vocab, subset_vocab)
+    word_length = len(original_vocab[0]) if original_vocab else 0
+    assessments = {}
+    for word, row in zip(original_vocab, codes.tolist()):
+        buckets = {}
+        for other, code in zip(subset_vocab, row):
+            if code not in buckets:
+                buckets[code] = set([other])
             else:
-                pattern_frequencies[word][assessment].add(other)
+                buckets[code].add(other)
+        pattern_frequencies[word] = {}
+        for code, others in buckets.items():
+            if code not in assessments:
+                assessments[code] = tuple(code_to_assessment(code, word_length))
+            pattern_frequencies[word][assessments[code]] = others
     return pattern_frequencies
 
 def compute_information_from_frequencies(pattern_frequencies, subsetted_vocab, path=None):
@@ -71,4 +88,136 @@ def compute_information_from_frequencies(pattern_frequencies, subsetted_vocab, p
                 expected_information[word] += probability * math.log(1/probability, 2)
             else:
                 expected_information[word] = probability * math.log(1/probability, 2)
-    return expected_information
\ No newline at end of file
+    return expected_information
+
+def _fixed_point_tables(num_candidates):
+    """log2(c) and c * log2(c) for every possible bucket size c, in fixed point"""
+    sizes = np.arange(num_candidates + 1)
+    log2_size = np.rint(np.log2(np.maximum(sizes, 1)) * _FIXED_POINT_SCALE).astype(np.int64)
+    return log2_size, sizes * log2_size
+
+def information_from_counts(counts):
+    """
+    Information of guesses from a (guesses x patterns) array of bucket
+    sizes over the same candidates (see solver.bucket_index), exactly equal
+    to compute_information over those candidates
+    """
+    counts = np.asarray(counts)
+    num_candidates = int(counts[0].sum()) if len(counts) else 0
+    if not num_candidates:
+        raise ValueError('Cannot compute information without any candidates.')
+    _, xlogx = _fixed_point_tables(num_candidates)
+    expected_information = np.empty(len(counts))
+    rows_per_block = max(1, _BLOCK_CELLS // counts.shape[1])
+    for start in range(0, len(counts), rows_per_block):
+        total = xlogx[counts[start:start + rows_per_block]].sum(axis=1)
+        expected_information[start:start + len(total)] = \
+            math.log2(num_candidates) - total / (num_candidates * _FIXED_POINT_SCALE)
+    return expected_information
+
+def bucket_histograms(pattern_matrix, candidate_ids, guess_ids=None, num_patterns=None):
+    """
+    Counts how many candidates fall in each bucket (pattern code) of every
+    guess, a block of rows at a time: the codes of a block are offset by
+    row and counted with a single bincount.
+
+    pattern_matrix is the (guesses x answers) array of pattern codes, and
+    candidate_ids is an index array of the answers counted. If guess_ids is
+    provided, only those rows are counted. Histograms have num_patterns
+    columns, or just enough for the largest code of their block.
+
+    Yields (start, bins, histogram) for every block of rows from start on:
+    the offset code of every (row, candidate) pair of the block (flattened
+    row by row) and the (rows x patterns) histogram of the block.
+    """
+    num_guesses = len(pattern_matrix) if guess_ids is None else len(guess_ids)
+    rows_per_block = max(1, _BLOCK_CELLS // max(1, len(candidate_ids)))
+    for start in range(0, num_guesses, rows_per_block):
+        if guess_ids is None:
+            codes = pattern_matrix[start:start + rows_per_block, candidate_ids]
+        else:
+            codes = pattern_matrix[np.ix_(guess_ids[start:start + rows_per_block], candidate_ids)]
+        num_rows = len(codes)
+        block_patterns = int(codes.max()) + 1 if num_patterns is None else num_patterns
+        offsets = np.arange(num_rows, dtype=np.intp)[:, None] * block_patterns
+        bins = (codes + offsets).ravel()
+        histogram = np.bincount(bins, minlength=num_rows * block_patterns)
+        yield start, bins, histogram.reshape(num_rows, block_patterns)
+
+def compute_information(pattern_matrix, candidate_ids, guess_ids=None):
+    """
+    Computes the expected information of guesses over the remaining
+    candidates, using a pattern matrix (see solver.pattern_matrix) rather
+    than a dictionary of pattern frequencies.
+
+    pattern_matrix is the (guesses x answers) array of pattern codes, and
+    candidate_ids is an index array of the answers that are still possible.
+    If guess_ids is provided, only those rows are scored.
+
+    Guesses are scored a block at a time from the (guesses x patterns)
+    histogram of their bucket sizes (see bucket_histograms). Information is then
+    log2(n) - sum(c * log2(c)) / n over the bucket sizes c, which is equal to
+    sum(P(x) * log2(1 / P(x))).
+
+    The sum is accumulated in fixed point, so it is exact and independent of
+    pattern order: guesses with equally sized buckets tie exactly.
+
+    Returns an array with one information value per scored guess.
+    """
+    num_candidates = len(candidate_ids)
+    if not num_candidates:
+        raise ValueError('Cannot compute information without any candidates.')
+    if guess_ids is not None:
+        guess_ids = np.asarray(guess_ids)
+        if guess_ids.dtype == bool:
+            guess_ids = np.flatnonzero(guess_ids)
+    num_guesses = len(pattern_matrix) if guess_ids is None else len(guess_ids)
+    expected_information = np.empty(num_guesses)
+    if not num_guesses:
+        return expected_information
+
+    log2_size, xlogx = _fixed_point_tables(num_candidates)
+    for start, bins, histogram in bucket_histograms(pattern_matrix, candidate_ids, guess_ids):
+        num_rows, num_patterns = histogram.shape
+        if num_candidates < num_patterns:
+            # Fewer candidates than patterns: sum log2(c) once per candidate
+            # instead of c * log2(c) once per (mostly empty) pattern
+            total = log2_size[histogram.ravel()[bins]].reshape(num_rows, num_candidates).sum(axis=1)
+        else:
+            total = xlogx[histogram].sum(axis=1)
+        expected_information[start:start + num_rows] = \
+            math.log2(num_candidates) - total / (num_candidates * _FIXED_POINT_SCALE)
+    return expected_information
+
+def distinct_partitions(codes):
+    """
+    Given a (guesses x candidates) array of pattern codes, returns the
+    (sorted) indices of the rows worth scoring: the first row of every
+    distinct way of partitioning the candidates into buckets, skipping
+    partitions which leave every candidate in one bucket.
+
+    Rows which split the candidates into the same buckets (whatever their
+    codes) have the same information, and a row with a single bucket has
+    none, so choosing the first row with the most information out of the
+    returned rows gives the same row as choosing it out of every row.
+
+    Only states of at most 11 candidates are supported: larger states have
+    few duplicate partitions, so pruning them costs more than it saves.
+    """
+    num_rows, num_candidates = codes.shape
+    if num_candidates > _MAX_PAIRWISE_CANDIDATES:
+        raise ValueError(f'Cannot find distinct partitions of {num_candidates} candidates, ' + \
+                         f'at most {_MAX_PAIRWISE_CANDIDATES}.')
+    if not num_rows or not num_candidates:
+        return np.arange(0)
+    # A partition is given by which pairs of candidates share a bucket, one
+    # bit per pair. Rows with every bit set have a single bucket.
+    signatures = np.zeros(num_rows, dtype=np.uint64)
+    bit = 0
+    for first in range(num_candidates):
+        for second in range(first + 1, num_candidates):
+            signatures |= (codes[:, first] == codes[:, second]).astype(np.uint64) << np.uint64(bit)
+            bit += 1
+    _, representatives = np.unique(signatures, return_index=True)
+    representatives = np.sort(representatives)
+    return representatives[signatures[representatives] != np.uint64((1 << bit) - 1)]
@@ -0,0 +1,105 @@
+import csv
+import json
+from collections import Counter
+
+# Fields of the dict passed to the on_turn hook of InformationBasedSolver.solve
+TURN_FIELDS = (
+    'word',                     # hidden word of the puzzle
+    'turn',                     # 1 for the first guess
+    'guess',
+    'guess_source',             # 'tree', 'cache', 'computed' or 'last' (one candidate left)
+    'candidates_before',        # possible solutions before the guess
+    'candidates_after',         # possible solutions after its feedback
+    'information_seconds',      # choosing the guess (computing information)
+    'filter_seconds',           # narrowing the candidates to the feedback
+    'assessment_cache_hits',    # Puzzle.assessments lookups answered (cache or matrix)
+    'assessment_cache_misses',
+)
+WORD_FIELDS = ('word', 'turns', 'information_seconds', 'filter_seconds', 'computed_guesses',
+               'assessment_cache_hits', 'assessment_cache_misses')
+DEPTH_FIELDS = ('turn', 'games', 'mean_candidates_before', 'mean_candidates_after',
+                'information_seconds', 'filter_seconds', 'tree', 'cache', 'computed', 'last')
+
+
+class SolveStats:
+    """
+    Collects the per-turn records reported by InformationBasedSolver.solve,
+    and summarizes them per word and per turn depth. An instance can be
+    passed directly as the on_turn hook, or to AssessSolver.assess.
+    """
+    def __init__(self) -> None:
+        self.turns = []
+
+    def __call__(self, turn):
+        self.turns.append(turn)
+
+    def __len__(self):
+        return len(self.turns)
+
+    def extend(self, turns):
+        self.turns.extend(turns)
+
+    def per_word(self):
+        """Dictionary of {word: totals over its turns}"""
+        words = {}
+        for turn in self.turns:
+            summary = words.get(turn['word'])
+            if summary is None:
+                summary = words[turn['word']] = dict.fromkeys(WORD_FIELDS[1:], 0)
+            summary['turns'] += 1
+            summary['information_seconds'] += turn['information_seconds']
+            summary['filter_seconds'] += turn['filter_seconds']
+            summary['computed_guesses'] += turn['guess_source'] == 'computed'
+            summary['assessment_cache_hits'] += turn['assessment_cache_hits']
+            summary['assessment_cache_misses'] += turn['assessment_cache_misses']
+        return words
+
+    def per_depth(self):
+        """Dictionary of {turn number: averages and totals over every game}"""
+        depths = {}
+        for turn in self.turns:
+            summary = depths.get(turn['turn'])
+            if summary is None:
+                summary = depths[turn['turn']] = {'games': 0, 'candidates_before': 0,
+                                                  'candidates_after': 0, 'information_seconds': 0.0,
+                                                  'filter_seconds': 0.0, 'sources': Counter()}
+            summary['games'] += 1
+            summary['candidates_before'] += turn['candidates_before']
+            summary['candidates_after'] += turn['candidates_after']
+            summary['information_seconds'] += turn['information_seconds']
+            summary['filter_seconds'] += turn['filter_seconds']
+            summary['sources'][turn['guess_source']] += 1
+        return {
+            depth: {
+                'games': summary['games'],
+                'mean_candidates_before': summary['candidates_before'] / summary['games'],
+                'mean_candidates_after': summary['candidates_after'] / summary['games'],
+                'information_seconds': summary['information_seconds'],
+                'filter_seconds': summary['filter_seconds'],
+                **{source: summary['sources'][source] for source in DEPTH_FIELDS[6:]},
+            }
+            for depth, summary in sorted(depths.items())
+        }
+
+    def dump_json(self, path):
+        """Writes the turns and both summaries to a JSON file"""
+        with open(path, 'w') as handle:
+            json.dump({'turns': self.turns, 'words': self.per_word(),
+                       'depths': self.per_depth()}, handle, indent=2)
+
+    def dump_csv(self, path, table='turns'):
+        """Writes one table ('turns', 'words' or 'depths') to a CSV file"""
+        if table == 'turns':
+            fields, rows = TURN_FIELDS, self.turns
+        elif table == 'words':
+            fields = WORD_FIELDS
+            rows = [{'word': word, **summary} for word, summary in self.per_word().items()]
+        elif table == 'depths':
+            fields = DEPTH_FIELDS
+            rows = [{'turn': depth, **summary} for depth, summary in self.per_depth().items()]
+        else:
+            raise ValueError(f'Unknown table {table!r}, expected turns, words or depths.')
+        with open(path, 'w', newline='') as handle:
+            writer = csv.DictWriter(handle, fieldnames=fields, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(rows)
@@ -0,0 +1,231 @@
+import math
+import numpy as np
+import solver.information as information
+from solver.candidate_set import ids_to_mask
+from solver.solver import InformationBasedSolver
+
+# Candidate sets up to this size are first checked for a candidate that
+# tells every other candidate apart, which is always an optimal guess
+_PERFECT_SPLIT_LIMIT = 64
+
+
+def _lower_bound(num_candidates):
+    """
+    Fewest total guesses needed to solve every one of `num_candidates`
+    answers: one of them can be solved by the next guess, and every other
+    one needs at least two.
+    """
+    return 2 * num_candidates - 1
+
+
+class LookaheadSolver(InformationBasedSolver):
+    """
+    Chooses guesses minimizing the expected number of guesses, rather than
+    greedily maximizing the information of the next one.
+
+    The cost of a set of candidates is the total number of guesses needed to
+    solve each of them. For a guess, it is the number of candidates (each
+    needs this guess) plus the cost of every bucket of candidates left by a
+    feedback other than all-green. The search is a depth-first branch and
+    bound over that recursion:
+
+        - at each state, only the `breadth` guesses with the most
+          information are tried (plus, for small states, a candidate that
+          splits every other candidate apart, which is always optimal),
+        - a guess is skipped as soon as its lower bound (every bucket solved
+          as fast as a bucket of its size possibly can be) reaches the best
+          cost found so far, and bucket searches are given the remaining
+          budget so they can give up early,
+        - results are memoized by candidate set, so states reached by
+          several guesses (or games) are searched once.
+
+    With max_depth set, states max_depth guesses or more below the state
+    being solved follow the greedy choice (most information) instead, as
+    InformationTheorySolver does. Every turn searches max_depth guesses
+    ahead of its own state again, so later turns can choose differently
+    from the strategy searched at the start: expected_guesses() is then the
+    cost of that strategy, not of the games solve() plays.
+    With breadth=None (every guess) and no max_depth the search is exact.
+    The defaults give a near-optimal strategy in practical time. Searching
+    the first guess is most of the work, so it can be fixed with `opener`.
+    Strategy trees are greedy, so none can be given.
+    """
+    def __init__(self, vocab, possible_solutions, *, cache_path=None, strategy_tree=None,
+                 breadth=3, max_depth=None, opener=None, word_length=None, cache_dir=None,
+                 memory_budget=None) -> None:
+        if strategy_tree is not None:
+            raise ValueError('Strategy trees hold greedy choices, so they cannot be used to look ahead.')
+        super().__init__(vocab, possible_solutions, cache_path=cache_path, strategy_tree=strategy_tree,
+                         word_length=word_length, cache_dir=cache_dir, memory_budget=memory_budget)
+        if breadth is not None and breadth < 1:
+            raise ValueError('breadth must be at least 1 (or None, for every guess).')
+        self.breadth = breadth
+        self.max_depth = max_depth
+        pattern_matrix = self.pattern_matrix
+        if opener is not None and opener not in pattern_matrix.guess_index:
+            raise ValueError(f'Opener {opener!r} is not in the vocabulary.')
+        self.opener = opener
+        self._initial_key = self.initial_state().key
+        # Guess id of every answer, or -1 for answers that are not guesses
+        self._answer_guess_ids = np.array(
+            [pattern_matrix.guess_index.get(answer, -1) for answer in pattern_matrix.answers],
+            dtype=np.intp)
+        # Exact results, {(candidate bitset, depth): (cost, guess id)}, and lower
+        # bounds proven by searches that ran out of budget
+        self._costs = {}
+        self._lower_bounds = {}
+
+    def __getstate__(self):
+        # Workers start from empty memo tables
+        state = super().__getstate__()
+        state['_costs'] = {}
+        state['_lower_bounds'] = {}
+        return state
+
+    def get_guess(self, word_information):
+        """Returns guess containing most information (used past max_depth)"""
+        return int(np.argmax(word_information))
+
+    def _choose_guess(self, state):
+        if len(state) == 1 and self._answer_guess_ids[state.candidate_ids[0]] >= 0:
+            return int(self._answer_guess_ids[state.candidate_ids[0]]), 'search'
+        hit = (state.key, self.max_depth) in self._costs
+        guess_id = self.search(state.candidate_ids)[1]
+        return guess_id, 'cache' if hit else 'search'
+
+    def _state_key(self, candidate_ids):
+        return ids_to_mask(candidate_ids, len(self.pattern_matrix.answers))
+
+    def expected_guesses(self, candidate_ids=None):
+        """
+        Average number of guesses the solver needs over a set of candidates
+        (all possible solutions by default), searching it if needed. With
+        max_depth set, this is the cost of the strategy searched from those
+        candidates (see the class docstring).
+        """
+        if candidate_ids is None:
+            candidate_ids = self.initial_state().candidate_ids
+        return self.search(candidate_ids)[0] / len(candidate_ids)
+
+    def search(self, candidate_ids):
+        """
+        Returns (total guesses, guess id) for the best strategy found for a
+        set of candidate answer ids, where total guesses is the sum of the
+        number of guesses needed for every candidate
+        """
+        candidate_ids = np.sort(np.asarray(candidate_ids, dtype=np.int32))
+        cost, guess_id = self._search(candidate_ids, self.max_depth, math.inf)
+        return int(cost), guess_id
+
+    def _bucket_counts(self, candidate_ids, guess_ids):
+        """Number of distinct feedbacks (non-empty buckets) of some guesses over a state"""
+        counts = np.empty(len(guess_ids), dtype=np.intp)
+        for start, _, histogram in information.bucket_histograms(
+                self.pattern_matrix.matrix, candidate_ids, guess_ids):
+            counts[start:start + len(histogram)] = np.count_nonzero(histogram, axis=1)
+        return counts
+
+    def _guess_pool(self, candidate_ids, depth):
+        """
+        List of (guess id, lower bound on its cost) worth trying for a
+        state, sorted by lower bound. The bound assumes every bucket is
+        solved as fast as a bucket of its size can be:
+        n + sum(2 * size - 1) over the buckets other than all-green.
+        """
+        word_information = information.compute_information(self.pattern_matrix.matrix, candidate_ids)
+        if self.opener is not None and len(candidate_ids) == len(self.possible_solutions) and \
+                self._state_key(candidate_ids) == self._initial_key:
+            guess_ids = np.array([self.pattern_matrix.guess_index[self.opener]])
+        elif depth == 0:
+            guess_ids = np.array([np.argmax(word_information)])
+        elif self.breadth is None:
+            guess_ids = np.argsort(-word_information, kind='stable')
+        else:
+            guess_ids = np.argsort(-word_information, kind='stable')[:self.breadth]
+        num_candidates = len(candidate_ids)
+        is_candidate = np.zeros(len(word_information), dtype=np.intp)
+        candidate_guess_ids = self._answer_guess_ids[candidate_ids]
+        is_candidate[candidate_guess_ids[candidate_guess_ids >= 0]] = 1
+        bounds = 3 * num_candidates - is_candidate[guess_ids] - \
+            self._bucket_counts(candidate_ids, guess_ids)
+        order = np.argsort(bounds, kind='stable')
+        return list(zip(guess_ids[order].tolist(), bounds[order].tolist()))
+
+    def _perfect_split(self, candidate_ids):
+        """A candidate that leaves every other candidate in its own bucket, or None"""
+        guess_ids = self._answer_guess_ids[candidate_ids]
+        guess_ids = guess_ids[guess_ids >= 0]
+        if not len(guess_ids):
+            return None
+        codes = np.sort(self.pattern_matrix.matrix[np.ix_(guess_ids, candidate_ids)], axis=1)
+        distinct = 1 + np.count_nonzero(codes[:, 1:] != codes[:, :-1], axis=1)
+        perfect = np.flatnonzero(distinct == len(candidate_ids))
+        return int(guess_ids[perfect[0]]) if len(perfect) else None
+
+    def _search(self, candidate_ids, depth, budget):
+        """
+        Best (cost, guess id) for a state, if its cost is below `budget`.
+        Otherwise, returns (lower bound, None) with a lower bound of at
+        least `budget`.
+        """
+        num_candidates = len(candidate_ids)
+        if num_candidates == 1:
+            # Solved by guessing it (answers which are not guesses are never
+            # left alone by the all-green check, see InformationBasedSolver)
+            return 1, int(self._answer_guess_ids[candidate_ids[0]])
+        key = (self._state_key(candidate_ids), depth)
+        result = self._costs.get(key)
+        if result is not None:
+            return result
+        lower_bound = max(_lower_bound(num_candidates), self._lower_bounds.get(key, 0))
+        if lower_bound >= budget:
+            return lower_bound, None
+
+        if num_candidates <= _PERFECT_SPLIT_LIMIT and depth != 0:
+            guess_id = self._perfect_split(candidate_ids)
+            if guess_id is not None:
+                result = self._costs[key] = (_lower_bound(num_candidates), guess_id)
+                return result
+
+        pattern_matrix = self.pattern_matrix
+        # States at depth 0 follow the greedy choice, and so do their buckets
+        child_depth = None if depth is None else max(depth - 1, 0)
+        best_cost, best_guess = budget, None
+        # Smallest lower bound over the guesses which could not beat best_cost
+        failed_bound = math.inf
+        for guess_id, cost in self._guess_pool(candidate_ids, depth):
+            if cost >= best_cost:
+                # The pool is sorted by bound, so no later guess can do better
+                failed_bound = min(failed_bound, cost)
+                break
+            codes = pattern_matrix.matrix[guess_id, candidate_ids]
+            order = np.argsort(codes, kind='stable')
+            sorted_codes = codes[order]
+            starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+            ends = np.r_[starts[1:], num_candidates]
+            if len(starts) == 1 and sorted_codes[0] != pattern_matrix.all_green_code:
+                # Learns nothing
+                continue
+            buckets = [(start, end) for start, end in zip(starts.tolist(), ends.tolist())
+                       if sorted_codes[start] != pattern_matrix.all_green_code]
+            # Largest buckets first: they are the likeliest to exceed the budget
+            for start, end in sorted(buckets, key=lambda bucket: bucket[0] - bucket[1]):
+                if cost >= best_cost:
+                    break
+                bucket_bound = _lower_bound(end - start)
+                child_ids = np.sort(candidate_ids[order[start:end]])
+                child_cost, _ = self._search(child_ids, child_depth, best_cost - cost + bucket_bound)
+                cost += child_cost - bucket_bound
+            if cost < best_cost:
+                best_cost, best_guess = cost, guess_id
+                if best_cost == lower_bound:
+                    break
+            else:
+                failed_bound = min(failed_bound, cost)
+
+        if best_guess is None:
+            failed_bound = max(lower_bound, failed_bound)
+            self._lower_bounds[key] = failed_bound
+            return failed_bound, None
+        result = self._costs[key] = (best_cost, best_guess)
+        return result
@@ -0,0 +1,205 @@
+"""
+Ranks every guess as a forced opening word by the whole games that follow
+it: the average and worst-case number of guesses the solver needs over
+every hidden word when it has to open with that word.
+
+Openers are split into shards of --shard-size words, evaluated by --processes
+worker processes. Every finished shard is saved in --checkpoint-dir, so an
+interrupted run picks up where it stopped when started again with the same
+directory. The final ranking is written as CSV.
+
+    python -m solver.opener_ranking --checkpoint-dir openers/ [--processes N]
+                                    [--shard-size 64] [--output openers.csv]
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import numpy as np
+import solver.pattern_cache as pattern_cache
+from solver.solver import InformationTheorySolver, load_vocab_file
+
+RANKING_FIELDS = ('rank', 'opener', 'average', 'worst', 'total_guesses')
+MANIFEST_NAME = 'manifest.json'
+
+# Evaluator used by pool workers, set once per process by _init_worker
+_worker_evaluator = None
+
+
+class GameTreeEvaluator:
+    """
+    Totals the guesses a solver needs over every game from a state, without
+    simulating the games one by one: each game in a state makes the next
+    guess, and every game not solved by it goes on in the state of its
+    feedback (a state of one candidate needs exactly one more guess).
+
+    The solver's choice only depends on the candidates (see
+    InformationBasedSolver.next_guess), so the (total guesses, worst case)
+    of every state is memoized by state key and shared by every opener
+    reaching it. At most max_memo states are kept, oldest first out.
+    """
+    def __init__(self, solver, max_memo=1 << 18) -> None:
+        if solver.hard_mode:
+            raise ValueError('Hard mode choices depend on the history, so they cannot be shared.')
+        self.solver = solver
+        self.max_memo = max_memo
+        self._memo = {}
+
+    def subtree(self, state):
+        """(total guesses, most guesses) over the games in a state, from its next guess on"""
+        if len(state) == 1:
+            return 1, 1
+        result = self._memo.get(state.key)
+        if result is None:
+            result = self.after_guess(state, self.solver.next_guess(state))
+            if len(self._memo) >= self.max_memo:
+                del self._memo[next(iter(self._memo))]
+            self._memo[state.key] = result
+        return result
+
+    def after_guess(self, state, guess_id):
+        """(total guesses, most guesses) over the games in a state, making guess_id next"""
+        pattern_matrix = self.solver.pattern_matrix
+        total, worst = len(state), 1
+        for code in np.unique(pattern_matrix.matrix[guess_id, state.candidate_ids]).tolist():
+            if code != pattern_matrix.all_green_code:
+                bucket_total, bucket_worst = self.subtree(state.narrow(pattern_matrix, guess_id, code))
+                total += bucket_total
+                worst = max(worst, bucket_worst + 1)
+        return total, worst
+
+    def evaluate_opener(self, guess_id):
+        """(total guesses, most guesses) over every possible solution, opening with guess_id"""
+        return self.after_guess(self.solver.initial_state(), guess_id)
+
+
+def _init_worker(solver):
+    global _worker_evaluator
+    _worker_evaluator = GameTreeEvaluator(solver)
+
+
+def _evaluate_shard(task):
+    """Evaluates one shard of openers and saves its checkpoint"""
+    path, openers = task
+    pattern_matrix = _worker_evaluator.solver.pattern_matrix
+    results = []
+    for opener in openers:
+        total, worst = _worker_evaluator.evaluate_opener(pattern_matrix.guess_index[opener])
+        results.append({'opener': opener, 'total_guesses': total, 'worst': worst})
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as handle:
+        json.dump(results, handle)
+    os.replace(tmp_path, path)
+    return results
+
+
+def _fingerprint(solver, openers):
+    """Identifies the word lists, solver version and openers a checkpoint belongs to"""
+    pattern_matrix = solver.pattern_matrix
+    return {
+        'solver': type(solver).__name__,
+        'solver_version': pattern_cache.SOLVER_VERSION,
+        'guesses': pattern_cache.hash_words(pattern_matrix.guesses).hex(),
+        'answers': pattern_cache.hash_words(solver.possible_solutions).hex(),
+        'openers': pattern_cache.hash_words(openers).hex(),
+    }
+
+
+def rank_openers(solver, checkpoint_dir, openers=None, processes=1, shard_size=64, verbose=False):
+    """
+    Evaluates every opener (all of the solver's guesses by default), reusing
+    the shards already saved in checkpoint_dir. Returns the ranking as a
+    list of dicts with RANKING_FIELDS, best (fewest guesses) first; ties
+    are broken by worst case, then alphabetically.
+
+    A checkpoint directory belongs to one set of word lists, openers and
+    shard size, and a ValueError is raised if it is used for another.
+    """
+    if openers is None:
+        openers = solver.pattern_matrix.guesses
+    manifest = {**_fingerprint(solver, openers), 'shard_size': shard_size}
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    manifest_path = os.path.join(checkpoint_dir, MANIFEST_NAME)
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as handle:
+            if json.load(handle) != manifest:
+                raise ValueError(f'{checkpoint_dir} holds checkpoints of another ranking run.')
+    else:
+        with open(manifest_path, 'w') as handle:
+            json.dump(manifest, handle, indent=2)
+
+    results = []
+    tasks = []
+    for shard, start in enumerate(range(0, len(openers), shard_size)):
+        path = os.path.join(checkpoint_dir, f'shard_{shard:05d}.json')
+        if os.path.exists(path):
+            with open(path) as handle:
+                results.extend(json.load(handle))
+        else:
+            tasks.append((path, openers[start:start + shard_size]))
+    num_shards = -(-len(openers) // shard_size)
+    if verbose:
+        print(f'{num_shards - len(tasks)} of {num_shards} shards already done')
+
+    if processes > 1 and len(tasks) > 1:
+        with multiprocessing.Pool(min(processes, len(tasks)), initializer=_init_worker,
+                                  initargs=(solver,)) as pool:
+            for done, shard_results in enumerate(pool.imap_unordered(_evaluate_shard, tasks), 1):
+                results.extend(shard_results)
+                if verbose:
+                    print(f'Shard {done}/{len(tasks)} done')
+    else:
+        _init_worker(solver)
+        for done, task in enumerate(tasks, 1):
+            results.extend(_evaluate_shard(task))
+            if verbose:
+                print(f'Shard {done}/{len(tasks)} done')
+
+    num_answers = len(solver.possible_solutions)
+    results.sort(key=lambda result: (result['total_guesses'], result['worst'], result['opener']))
+    return [{'rank': rank, 'opener': result['opener'],
+             'average': result['total_guesses'] / num_answers, 'worst': result['worst'],
+             'total_guesses': result['total_guesses']}
+            for rank, result in enumerate(results, 1)]
+
+
+def write_ranking(path, ranking):
+    with open(path, 'w', newline='') as handle:
+        writer = csv.DictWriter(handle, fieldnames=RANKING_FIELDS)
+        writer.writeheader()
+        writer.writerows(ranking)
+
+
+def main():
+    package_dir = os.path.dirname(__file__)
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--checkpoint-dir', required=True, help='Directory of the finished shards')
+    parser.add_argument('--output', default='openers.csv', help='CSV file receiving the ranking')
+    parser.add_argument('--processes', type=int, default=os.cpu_count())
+    parser.add_argument('--shard-size', type=int, default=64, help='Openers per shard')
+    parser.add_argument('--openers', help='Comma separated openers to rank (every guess by default)')
+    parser.add_argument('--official-words', default=os.path.join(package_dir, 'official_words.txt'))
+    parser.add_argument('--hidden-words', default=os.path.join(package_dir, 'hidden_words.txt'))
+    parser.add_argument('--word-length', type=int)
+    parser.add_argument('--cache-dir', default=pattern_cache.DEFAULT_CACHE_DIR)
+    args = parser.parse_args()
+
+    info_solver = InformationTheorySolver(load_vocab_file(args.official_words, args.word_length),
+                                          load_vocab_file(args.hidden_words, args.word_length),
+                                          cache_dir=args.cache_dir)
+    openers = args.openers.split(',') if args.openers else None
+    unknown = [word for word in openers or [] if word not in info_solver.pattern_matrix.guess_index]
+    if unknown:
+        parser.error(f'Unknown openers: {", ".join(unknown)}')
+    ranking = rank_openers(info_solver, args.checkpoint_dir, openers, args.processes, args.shard_size,
+                           verbose=True)
+    write_ranking(args.output, ranking)
+    for row in ranking[:10]:
+        print(f'{row["rank"]:>6} {row["opener"]} {row["average"]:.4f} (worst {row["worst"]})')
+    print(f'Ranking of {len(ranking)} openers written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
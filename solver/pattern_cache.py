@@ -0,0 +1,164 @@
+import hashlib
+import os
+import struct
+import numpy as np
+from solver.pattern_matrix import PatternMatrix, pattern_dtype
+
+# On-disk layout of a pattern cache file (all integers little-endian):
+#
+#   header      struct _HEADER, padded to _ALIGNMENT bytes
+#   guesses     guess words, UTF-8, newline separated
+#   answers     answer words, UTF-8, newline separated
+#   matrix      raw (num_guesses x num_answers) pattern codes, C order
+#   information raw float64 information per guess (optional)
+#
+# The matrix and information sections start on _ALIGNMENT byte boundaries,
+# so they can be memory-mapped directly and shared between processes.
+MAGIC = b'WBPATTRN'
+FORMAT_VERSION = 1
+# Version of the pattern rules and information computation, bumped whenever
+# they change what a cache holds; part of every content address
+SOLVER_VERSION = 1
+_HEADER = struct.Struct('<8sHHII32s32sQQQQQ')
+_ALIGNMENT = 64
+# Directory of the content-addressed caches built by cache_path_for
+DEFAULT_CACHE_DIR = os.environ.get(
+    'WORDLEBOT_CACHE_DIR',
+    os.path.join(os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache')),
+                 'wordlebot'))
+
+
+def hash_words(words):
+    """SHA-256 digest of a word list, sensitive to order"""
+    return hashlib.sha256('\n'.join(words).encode('utf-8')).digest()
+
+
+def cache_path_for(guesses, answers, cache_dir=None):
+    """
+    Path of the pattern cache for a (guesses, answers) pair of word lists in
+    cache_dir (DEFAULT_CACHE_DIR by default). The name is derived from the
+    contents of both lists and the format and solver versions, so every
+    dictionary and word length gets its own file, built once and reused by
+    every run that uses the same lists, and a changed list (or solver) never
+    picks up a stale file.
+    """
+    digest = hashlib.sha256(struct.pack('<HH', FORMAT_VERSION, SOLVER_VERSION) +
+                            hash_words(guesses) + hash_words(answers)).hexdigest()
+    word_length = len(guesses[0]) if guesses else 0
+    return os.path.join(cache_dir or DEFAULT_CACHE_DIR, f'patterns_{word_length}_{digest[:16]}.bin')
+
+
+def _align(offset):
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def save_pattern_cache(path, pattern_matrix, information=None):
+    """
+    Writes a PatternMatrix (and optionally the information of every guess)
+    to `path`. The file is written to a temporary name and then renamed,
+    so readers never observe a partially written cache.
+    """
+    guesses_blob = '\n'.join(pattern_matrix.guesses).encode('utf-8')
+    answers_blob = '\n'.join(pattern_matrix.answers).encode('utf-8')
+    matrix = np.ascontiguousarray(pattern_matrix.matrix,
+                                  dtype=pattern_dtype(pattern_matrix.word_length))
+    words_offset = _align(_HEADER.size)
+    matrix_offset = _align(words_offset + len(guesses_blob) + len(answers_blob))
+    information_offset = 0
+    if information is not None:
+        information = np.ascontiguousarray(information, dtype='<f8')
+        if information.shape != (len(pattern_matrix.guesses),):
+            raise ValueError('Information must hold exactly one value per guess.')
+        information_offset = _align(matrix_offset + matrix.nbytes)
+    header = _HEADER.pack(
+        MAGIC, FORMAT_VERSION, pattern_matrix.word_length,
+        len(pattern_matrix.guesses), len(pattern_matrix.answers),
+        hash_words(pattern_matrix.guesses), hash_words(pattern_matrix.answers),
+        len(guesses_blob), len(answers_blob), words_offset, matrix_offset, information_offset)
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as handle:
+        handle.write(header)
+        handle.seek(words_offset)
+        handle.write(guesses_blob)
+        handle.write(answers_blob)
+        handle.seek(matrix_offset)
+        handle.write(matrix.tobytes())
+        if information is not None:
+            handle.seek(information_offset)
+            handle.write(information.tobytes())
+    os.replace(tmp_path, path)
+
+
+def read_cache_header(path):
+    """
+    Reads and checks the header of a pattern cache file. Returns a dict
+    with the header fields.
+    """
+    with open(path, 'rb') as handle:
+        raw = handle.read(_HEADER.size)
+    if len(raw) < _HEADER.size:
+        raise ValueError(f'{path} is too short to be a pattern cache.')
+    (magic, version, word_length, num_guesses, num_answers, guesses_hash, answers_hash,
+     guesses_size, answers_size, words_offset, matrix_offset, information_offset) = _HEADER.unpack(raw)
+    if magic != MAGIC:
+        raise ValueError(f'{path} is not a pattern cache.')
+    if version != FORMAT_VERSION:
+        raise ValueError(f'{path} has cache format version {version}, expected {FORMAT_VERSION}.')
+    return {
+        'word_length': word_length,
+        'num_guesses': num_guesses,
+        'num_answers': num_answers,
+        'guesses_hash': guesses_hash,
+        'answers_hash': answers_hash,
+        'guesses_size': guesses_size,
+        'answers_size': answers_size,
+        'words_offset': words_offset,
+        'matrix_offset': matrix_offset,
+        'information_offset': information_offset,
+    }
+
+
+def read_cache_words(path, header=None):
+    """(guesses, answers) word lists of a pattern cache file, as stored"""
+    header = header or read_cache_header(path)
+    with open(path, 'rb') as handle:
+        handle.seek(header['words_offset'])
+        guesses = handle.read(header['guesses_size']).decode('utf-8')
+        answers = handle.read(header['answers_size']).decode('utf-8')
+    return (guesses.split('\n') if header['num_guesses'] else [],
+            answers.split('\n') if header['num_answers'] else [])
+
+
+def load_pattern_cache(path, guesses=None, answers=None):
+    """
+    Loads a pattern cache written by save_pattern_cache. The matrix and
+    information are memory-mapped read-only rather than read into memory,
+    so processes loading the same file share one page-cached copy.
+
+    If guesses and/or answers are provided, they are checked against the
+    word list hashes in the header and a ValueError is raised on mismatch.
+
+    Returns a tuple of (PatternMatrix, information), where information is
+    None if the cache was saved without it.
+    """
+    header = read_cache_header(path)
+    if guesses is not None and hash_words(guesses) != header['guesses_hash']:
+        raise ValueError(f'{path} was built from a different guess list.')
+    if answers is not None and hash_words(answers) != header['answers_hash']:
+        raise ValueError(f'{path} was built from a different answer list.')
+
+    cached_guesses, cached_answers = read_cache_words(path, header)
+
+    shape = (header['num_guesses'], header['num_answers'])
+    if 0 in shape:
+        matrix = np.zeros(shape, dtype=pattern_dtype(header['word_length']))
+    else:
+        matrix = np.memmap(path, dtype=pattern_dtype(header['word_length']), mode='r',
+                           offset=header['matrix_offset'], shape=shape)
+    information = None
+    if header['information_offset'] and header['num_guesses']:
+        information = np.memmap(path, dtype='<f8', mode='r',
+                                offset=header['information_offset'], shape=(header['num_guesses'],))
+    return PatternMatrix(cached_guesses, cached_answers, matrix), information
@@ -0,0 +1,523 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+from solver.wordle_color import WordleColor
+
+NUM_COLORS = 3
+
+# Number of (guess, answer) cells assessed at once when building a matrix,
+# which keeps the intermediate arrays small enough to stay in cache
+_CHUNK_CELLS = 1 << 16
+
+# Size of the blocks of rows a LazyPatternTable computes (and evicts) at once
+_LAZY_BLOCK_BYTES = 1 << 20
+
+
+def num_patterns(word_length):
+    """Number of distinct feedback patterns for words of a given length"""
+    return NUM_COLORS ** word_length
+
+
+def pattern_dtype(word_length):
+    """
+    Smallest unsigned integer dtype able to hold every pattern code. Raises
+    a ValueError for words too long for any (beyond 20 letters).
+    """
+    patterns = num_patterns(word_length)
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if patterns <= np.iinfo(dtype).max + 1:
+            return dtype
+    raise ValueError(f'Words of length {word_length} have too many feedback patterns to encode.')
+
+
+def all_green_code(word_length):
+    """Pattern code for a solved puzzle (every position GREEN)"""
+    return num_patterns(word_length) - 1
+
+
+def assessment_to_code(assessment):
+    """
+    Encodes an assessment (a sequence of WordleColor) as a single base-3
+    integer. Position 0 is the least significant digit, so
+    [GREEN, BLACK, YELLOW] is encoded as 2 * 1 + 0 * 3 + 1 * 9 = 11.
+    """
+    code = 0
+    for color in reversed(assessment):
+        code = code * NUM_COLORS + color.value
+    return code
+
+
+def code_to_assessment(code, word_length):
+    """Decodes a base-3 pattern code back to a list of WordleColor"""
+    assessment = []
+    for _ in range(word_length):
+        code, color = divmod(int(code), NUM_COLORS)
+        assessment.append(WordleColor(color))
+    return assessment
+
+
+def encode_words(words):
+    """
+    Encodes a list of equal-length words as a (len(words), word_length)
+    array of character codes. Uses uint8 whenever every character fits.
+    """
+    if not words:
+        return np.zeros((0, 0), dtype=np.uint8)
+    word_length = len(words[0])
+    if any(len(word) != word_length for word in words):
+        raise ValueError('All words must have the same length.')
+    encoded = np.array(words, dtype=f'<U{word_length}').view(np.uint32)
+    encoded = encoded.reshape(len(words), word_length)
+    if encoded.size and encoded.max() < 256:
+        encoded = encoded.astype(np.uint8)
+    return encoded
+
+
+def _letter_ids(guesses, answers):
+    """Re-encodes character codes as dense letter ids 0..alphabet_size-1"""
+    alphabet, inverse = np.unique(np.concatenate([guesses.ravel(), answers.ravel()]),
+                                  return_inverse=True)
+    inverse = inverse.astype(np.intp)
+    return (inverse[:guesses.size].reshape(guesses.shape),
+            inverse[guesses.size:].reshape(answers.shape),
+            len(alphabet))
+
+
+def _repeat_signatures(guesses):
+    """
+    For every guess and position, the first position holding the same letter.
+    Guesses sharing a signature repeat letters in the same places, so they
+    can be assessed together with the same sequence of array operations.
+    """
+    signatures = np.empty(guesses.shape, dtype=np.int8)
+    for idx in range(guesses.shape[1]):
+        signatures[:, idx] = np.argmax(guesses[:, :idx + 1] == guesses[:, idx:idx + 1], axis=1)
+    return signatures
+
+
+def _assess_block(guesses, answers, signature, letter_counts, out):
+    """
+    Writes the pattern code of every (guess, answer) pair into `out`, for a
+    block of guesses sharing one repeat signature. Follows the same rules as
+    Puzzle.assess_guess: greens are resolved first, then each remaining guess
+    letter is YELLOW while unmatched copies of it remain in the answer.
+    """
+    word_length = guesses.shape[1]
+    greens = [(guesses[:, idx][:, None] == answers[:, idx][None, :]).view(np.uint8)
+              for idx in range(word_length)]
+    out[...] = 0
+    for idx in range(word_length):
+        same_letter = [other for other in range(word_length) if signature[other] == signature[idx]]
+        counts = letter_counts[guesses[:, idx]]
+        if len(same_letter) == 1:
+            # A green letter is always present, so GREEN == 1 + present and
+            # YELLOW == 0 + present
+            colors = greens[idx] + (counts > 0).view(np.uint8)
+        else:
+            # Copies of this letter in the answer not matched as green, minus
+            # copies already claimed by earlier occurrences in the guess
+            available = counts.astype(np.int8)
+            for other in same_letter:
+                available -= greens[other]
+                if other < idx:
+                    available -= 1 - greens[other]
+            colors = WordleColor.GREEN.value * greens[idx] + \
+                ((available > 0) & (greens[idx] == 0)).view(np.uint8)
+        out += colors * out.dtype.type(NUM_COLORS ** idx)
+
+
+def _signature_groups(guess_letters):
+    """
+    (signatures, group of every guess): the distinct repeat signatures of a
+    set of guesses, and which of them each guess has
+    """
+    signatures = _repeat_signatures(guess_letters)
+    word_length = signatures.shape[1]
+    if word_length ** word_length < 2 ** 63:
+        # Signatures are base-word_length numbers, and unique is much faster on those
+        keys = signatures.astype(np.int64) @ (word_length ** np.arange(word_length, dtype=np.int64))
+        keys, first, groups = np.unique(keys, return_index=True, return_inverse=True)
+        return signatures[first], groups.ravel()
+    signatures, groups = np.unique(signatures, axis=0, return_inverse=True)
+    return signatures, groups.ravel()
+
+
+def _assess_letters(guess_letters, answer_letters, alphabet_size, signatures, groups, dtype):
+    """assess_encoded for words already given as letter ids, with the guesses' signature groups"""
+    matrix = np.empty((len(guess_letters), len(answer_letters)), dtype=dtype)
+    if not matrix.size:
+        return matrix
+    word_length = guess_letters.shape[1]
+    letter_counts = np.zeros((alphabet_size, len(answer_letters)), dtype=np.uint8)
+    for idx in range(word_length):
+        letter_counts[answer_letters[:, idx], np.arange(len(answer_letters))] += 1
+    chunk = max(1, _CHUNK_CELLS // len(answer_letters))
+    for group in np.unique(groups).tolist():
+        rows = np.flatnonzero(groups == group)
+        for start in range(0, len(rows), chunk):
+            block = rows[start:start + chunk]
+            codes = np.empty((len(block), len(answer_letters)), dtype=dtype)
+            _assess_block(guess_letters[block], answer_letters, signatures[group], letter_counts, codes)
+            matrix[block] = codes
+    return matrix
+
+
+def assess_encoded(guesses, answers):
+    """
+    Vectorized counterpart of Puzzle.assess_guess for integer-encoded words
+    (see encode_words). Returns an array of shape (len(guesses),
+    len(answers)) holding the pattern code of every (guess, answer) pair.
+
+    Guesses are grouped by where they repeat letters. Within a group, greens
+    are one comparison per position, letters that appear once are yellow
+    whenever the answer contains them, and repeated letters are yellow while
+    copies not matched as green (or claimed by an earlier occurrence) remain.
+    """
+    if len(guesses) and len(answers) and guesses.shape[1] != answers.shape[1]:
+        raise ValueError('Guesses and answers must have the same word length.')
+    word_length = guesses.shape[1] if len(guesses) else answers.shape[1]
+    dtype = pattern_dtype(word_length)
+    if not len(guesses) or not len(answers):
+        return np.empty((len(guesses), len(answers)), dtype=dtype)
+    guess_letters, answer_letters, alphabet_size = _letter_ids(guesses, answers)
+    return _assess_letters(guess_letters, answer_letters, alphabet_size,
+                           *_signature_groups(guess_letters), dtype)
+
+
+def compute_pattern_matrix(guesses, answers):
+    """
+    Computes the pattern code for every (guess, answer) pair. Returns a dense
+    array of shape (len(guesses), len(answers)), where entry [i, j] is
+    assessment_to_code(Puzzle.assess_guess(guesses[i], answers[j])).
+    """
+    return assess_encoded(encode_words(guesses), encode_words(answers))
+
+
+class LazyPatternTable:
+    """
+    Stands in for the dense (guesses x answers) array of pattern codes,
+    computing blocks of rows on first use instead of all of them up front.
+    Supports the indexing the solvers use: an int, slice or array of rows,
+    optionally with an int, slice or array of columns, where arrays of rows
+    and columns select every (row, column) pair (as with np.ix_). Several
+    threads can index the table at once: what is kept is only changed under
+    a lock, and codes are computed outside it, so two threads missing the
+    same block both compute it and store the same codes.
+
+    Without a memory budget, blocks are computed into one array, which is
+    indexed directly once every block a request needs is there. With
+    memory_budget bytes, computed blocks are kept, least recently used
+    first out, while they fit, so a table far larger than the budget can
+    still be scanned block by block. Blocks not kept are not computed whole
+    for a few columns: only those columns are, and the last such set of
+    columns is kept for every guess (if it fits in half the budget), since
+    the solvers score a state a slice of guesses at a time. Blocks and
+    columns together never keep more than memory_budget bytes.
+    """
+    ndim = 2
+
+    def __init__(self, guesses, answers, memory_budget=None) -> None:
+        guesses, answers = encode_words(list(guesses)), encode_words(list(answers))
+        self.shape = (len(guesses), len(answers))
+        self.dtype = np.dtype(pattern_dtype(max(guesses.shape[1], answers.shape[1])))
+        self.memory_budget = memory_budget
+        # Letter ids and repeat signatures are worked out once for the whole table
+        self._guess_letters, self._answer_letters, self._alphabet_size = _letter_ids(guesses, answers)
+        self._signatures, self._groups = _signature_groups(self._guess_letters) \
+            if len(guesses) else (None, np.zeros(0, dtype=np.intp))
+        row_bytes = max(1, self.shape[1] * self.dtype.itemsize)
+        block_bytes = _LAZY_BLOCK_BYTES if memory_budget is None else min(_LAZY_BLOCK_BYTES, memory_budget)
+        self.block_rows = max(1, block_bytes // row_bytes)
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        num_blocks = -(-self.shape[0] // self.block_rows)
+        if self.memory_budget is None:
+            # Pages of the array are only allocated as blocks are written
+            self._matrix = np.empty(self.shape, dtype=self.dtype)
+            self._computed = np.zeros(num_blocks, dtype=bool)
+            self._complete = not num_blocks
+        else:
+            self._blocks = OrderedDict()
+            # (column ids, their codes for every guess), see _columns_of
+            self._columns = None
+
+    def __getstate__(self):
+        # Computed codes are left behind, so workers start within the budget
+        state = {name: value for name, value in self.__dict__.items()
+                 if name in ('shape', 'dtype', 'memory_budget', 'block_rows', '_guess_letters',
+                             '_answer_letters', '_alphabet_size', '_signatures', '_groups')}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._reset()
+
+    def __len__(self):
+        return self.shape[0]
+
+    @property
+    def size(self):
+        return self.shape[0] * self.shape[1]
+
+    @property
+    def nbytes(self):
+        """Bytes the whole table would take"""
+        return self.size * self.dtype.itemsize
+
+    @property
+    def cached_bytes(self):
+        """Bytes of the codes currently computed and kept"""
+        with self._lock:
+            if self.memory_budget is None:
+                return sum(self._block_range(block_id).size for block_id in
+                           np.flatnonzero(self._computed).tolist()) * self.shape[1] * self.dtype.itemsize
+            return self._cached_bytes()
+
+    def _cached_bytes(self):
+        columns_bytes = self._columns[1].nbytes if self._columns is not None else 0
+        return columns_bytes + sum(block.nbytes for block in self._blocks.values())
+
+    def _evict(self, keep_columns=False):
+        """
+        Drops the least recently used blocks, then the kept columns, until
+        the codes kept fit in the budget. The last block used goes after
+        the columns, unless keep_columns is set. Call with the lock held.
+        """
+        cached = self._cached_bytes()
+        while cached > self.memory_budget and len(self._blocks) > (0 if keep_columns else 1):
+            cached -= self._blocks.popitem(last=False)[1].nbytes
+        if cached > self.memory_budget and self._columns is not None:
+            cached -= self._columns[1].nbytes
+            self._columns = None
+        if cached > self.memory_budget:
+            self._blocks.clear()
+
+    def _block_range(self, block_id):
+        return np.arange(block_id * self.block_rows, min((block_id + 1) * self.block_rows, self.shape[0]))
+
+    def _assess(self, row_ids, columns):
+        return _assess_letters(self._guess_letters[row_ids], self._answer_letters[columns],
+                               self._alphabet_size, self._signatures, self._groups[row_ids], self.dtype)
+
+    def _block(self, block_id):
+        """Rows of a block, computed unless kept from an earlier use"""
+        if self.memory_budget is None:
+            if not self._computed[block_id]:
+                rows = self._block_range(block_id)
+                self._matrix[rows[0]:rows[-1] + 1] = self._assess(rows, slice(None))
+                with self._lock:
+                    self._computed[block_id] = True
+                    self._complete = bool(self._computed.all())
+            return self._matrix[block_id * self.block_rows:(block_id + 1) * self.block_rows]
+        with self._lock:
+            block = self._blocks.get(block_id)
+            if block is not None:
+                self._blocks.move_to_end(block_id)
+                return block
+        block = self._assess(self._block_range(block_id), slice(None))
+        with self._lock:
+            self._blocks[block_id] = block
+            self._evict()
+        return block
+
+    def _rows(self, row_ids, columns):
+        """(len(row_ids), columns) array of the codes of some rows"""
+        column_ids = np.arange(self.shape[1])[columns]
+        if column_ids.ndim == 0:
+            return self._rows(row_ids, column_ids[None])[:, 0]
+        out = np.empty((len(row_ids), len(column_ids)), dtype=self.dtype)
+        few_columns = len(column_ids) <= self.shape[1] // 2
+        block_ids = row_ids // self.block_rows
+        missing = []
+        for block_id in np.unique(block_ids).tolist():
+            selected = np.flatnonzero(block_ids == block_id)
+            with self._lock:
+                block = self._blocks.get(block_id)
+            if block is None and few_columns:
+                missing.append(selected)
+            else:
+                block = self._block(block_id)
+                out[selected] = block[row_ids[selected] - block_id * self.block_rows][:, column_ids]
+        if missing:
+            selected = np.concatenate(missing)
+            out[selected] = self._columns_of(row_ids[selected], column_ids)
+        return out
+
+    def _columns_of(self, row_ids, column_ids):
+        """
+        Codes of some columns for some rows, from (or into, for more than one
+        row) the codes of those columns for every guess when they fit in
+        half the budget
+        """
+        with self._lock:
+            kept = self._columns
+        if kept is not None and np.array_equal(kept[0], column_ids):
+            return kept[1][row_ids]
+        if len(row_ids) == 1 or self.shape[0] * len(column_ids) * self.dtype.itemsize > self.memory_budget // 2:
+            return self._assess(row_ids, column_ids)
+        codes = self._assess(np.arange(self.shape[0]), column_ids)
+        with self._lock:
+            self._columns = (column_ids, codes)
+            self._evict(keep_columns=True)
+        return codes[row_ids]
+
+    def __getitem__(self, key):
+        rows, columns = key if isinstance(key, tuple) else (key, slice(None))
+        if self.memory_budget is None:
+            if not self._complete:
+                for block_id in self._blocks_of(rows):
+                    self._block(block_id)
+            return self._matrix[key]
+        if isinstance(rows, (int, np.integer)):
+            self._blocks_of(rows)
+            row = int(rows) % self.shape[0]
+            if isinstance(columns, (int, np.integer)):
+                return self._rows(np.array([row]), np.array([columns]))[0, 0]
+            return self._rows(np.array([row]), columns)[0]
+        if isinstance(rows, slice):
+            return self._rows(np.arange(*rows.indices(self.shape[0])), columns)
+        rows = np.asarray(rows)
+        if rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        if rows.ndim == 2 and rows.shape[1] == 1:  # np.ix_
+            rows, columns = rows[:, 0], np.asarray(columns).ravel()
+        elif rows.ndim != 1 or not isinstance(columns, (slice, int, np.integer)):
+            raise IndexError('Arrays of rows take an int or slice of columns, or come from np.ix_.')
+        self._blocks_of(rows)
+        return self._rows(rows % self.shape[0], columns)
+
+    def _blocks_of(self, rows):
+        """
+        Sorted ids of the blocks holding some rows (an int, slice or index
+        array), raising IndexError for rows out of range
+        """
+        if isinstance(rows, slice):
+            start, stop, step = rows.indices(self.shape[0])
+            if step == 1:
+                return list(range(start // self.block_rows, -(-stop // self.block_rows))) \
+                    if start < stop else []
+            rows = np.arange(start, stop, step)
+        rows = np.asarray(rows)
+        if rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        rows = rows.ravel()
+        if len(rows) and not (-self.shape[0] <= rows.min() and rows.max() < self.shape[0]):
+            raise IndexError(f'Rows out of range for {self.shape[0]} guesses.')
+        return np.unique((rows % self.shape[0]) // self.block_rows).tolist() if len(rows) else []
+
+    def take(self, indices, axis=None, out=None, mode='raise'):
+        """np.take along either axis (rows are computed one block at a time)"""
+        if axis == 1:
+            return self[:, np.asarray(indices)]
+        if axis == 0:
+            return self[np.asarray(indices)]
+        return np.asarray(self).take(indices, out=out, mode=mode)
+
+    def __array__(self, dtype=None, copy=None):
+        matrix = self[:]
+        return matrix if dtype is None else matrix.astype(dtype)
+
+
+class PatternMatrix:
+    """
+    Pattern codes for every (guess, answer) pair, stored as one dense integer
+    array. Rows are indexed by guess id and columns by answer id, where ids
+    are positions in the `guesses` and `answers` lists.
+
+    This replaces the nested {guess: {pattern: set(words)}} dictionaries from
+    information.compute_pattern_frequencies: the bucket for a pattern is
+    simply the set of columns in a row holding that code.
+    """
+    def __init__(self, guesses, answers, matrix=None) -> None:
+        self.guesses = list(guesses)
+        self.answers = list(answers)
+        self.guess_index = {word: idx for idx, word in enumerate(self.guesses)}
+        self.answer_index = {word: idx for idx, word in enumerate(self.answers)}
+        words = self.guesses or self.answers
+        self.word_length = len(words[0]) if words else 0
+        if matrix is None:
+            matrix = compute_pattern_matrix(self.guesses, self.answers)
+        if matrix.shape != (len(self.guesses), len(self.answers)):
+            raise ValueError(f'Matrix shape {matrix.shape} does not match ' + \
+                             f'{len(self.guesses)} guesses x {len(self.answers)} answers.')
+        self.matrix = matrix
+
+    @classmethod
+    def lazy(cls, guesses, answers, memory_budget=None):
+        """
+        PatternMatrix whose rows are computed on first use, keeping at most
+        memory_budget bytes of them (see LazyPatternTable)
+        """
+        return cls(guesses, answers, LazyPatternTable(guesses, answers, memory_budget))
+
+    def __reduce__(self):
+        """
+        Pickles a memory-mapped matrix by reference to its file, so a
+        PatternMatrix loaded from a pattern cache can be sent to worker
+        processes, which map the same page-cached file instead of copying it.
+        """
+        if isinstance(self.matrix, np.memmap) and self.matrix.filename:
+            return (_attach_memmap, (self.guesses, self.answers, self.matrix.filename,
+                                     self.matrix.offset, self.matrix.dtype.str, self.matrix.shape))
+        if isinstance(self.matrix, LazyPatternTable):
+            return (PatternMatrix, (self.guesses, self.answers, self.matrix))
+        return (PatternMatrix, (self.guesses, self.answers, np.asarray(self.matrix)))
+
+    @property
+    def num_patterns(self):
+        return num_patterns(self.word_length)
+
+    @property
+    def all_green_code(self):
+        return all_green_code(self.word_length)
+
+    def code(self, guess, answer):
+        """Pattern code of a single (guess, answer) pair"""
+        return int(self.matrix[self.guess_index[guess], self.answer_index[answer]])
+
+    def answer_ids(self, words):
+        """Column ids for a list of answer words, as an index array"""
+        return np.array([self.answer_index[word] for word in words], dtype=np.intp)
+
+    def filter_candidates(self, guess_id, code, candidate_ids):
+        """Subset of candidate_ids that produce `code` when `guess_id` is guessed"""
+        return candidate_ids[self.matrix[guess_id, candidate_ids] == code]
+
+    def bucket(self, guess, assessment, candidate_ids=None):
+        """
+        Words which would produce `assessment` when `guess` is guessed,
+        optionally restricted to a subset of answer ids
+        """
+        if candidate_ids is None:
+            candidate_ids = np.arange(len(self.answers))
+        ids = self.filter_candidates(self.guess_index[guess], assessment_to_code(assessment),
+                                     candidate_ids)
+        return [self.answers[idx] for idx in ids]
+
+    @classmethod
+    def from_pattern_frequencies(cls, pattern_frequencies):
+        """
+        Builds a PatternMatrix from the nested dictionaries produced by
+        information.compute_pattern_frequencies. Answers are sorted, since
+        the buckets are unordered sets.
+        """
+        guesses = list(pattern_frequencies.keys())
+        answers = sorted(set().union(*(
+            words for buckets in pattern_frequencies.values() for words in buckets.values())))
+        answer_index = {word: idx for idx, word in enumerate(answers)}
+        word_length = len(guesses[0]) if guesses else 0
+        matrix = np.zeros((len(guesses), len(answers)), dtype=pattern_dtype(word_length))
+        for row, guess in enumerate(guesses):
+            for assessment, words in pattern_frequencies[guess].items():
+                columns = [answer_index[word] for word in words]
+                matrix[row, columns] = assessment_to_code(assessment)
+        return cls(guesses, answers, matrix)
+
+
+def _attach_memmap(guesses, answers, filename, offset, dtype, shape):
+    """Rebuilds a pickled PatternMatrix by mapping its file read-only"""
+    matrix = np.memmap(filename, dtype=dtype, mode='r', offset=offset, shape=shape)
+    return PatternMatrix(guesses, answers, matrix)
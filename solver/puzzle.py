@@ -1,4 +1,8 @@
 import random 
+from solver.assessment_cache import AssessmentCache
+import numpy as np
+from solver.pattern_matrix import assess_encoded, assessment_to_code, code_to_assessment, \
+    encode_words
 from solver.wordle_color import WordleColor
 
 class Puzzle:
@@ -7,19 +11,32 @@ class Puzzle:
     our guess. Also increments guess count every time it's queried. 
 
     If a word is not explicitly provided, vocab must be provided. 
-    In this case, a random word will be chosen from the vocab list.
+    In this case, a random word will be chosen from the vocab list (from its
+    words of length word_length, if given). Guesses must have the same
+    length as the word.
+
+    Assessments are cached in Puzzle.assessments, a bounded AssessmentCache
+    shared by all puzzles (see AssessmentCache for configuration).
     """
-    assessments = {}
-    def __init__(self, word=None, vocab=None) -> None:
+    assessments = AssessmentCache()
+    def __init__(self, word=None, vocab=None, word_length=None) -> None:
+        if vocab and word_length is not None:
+            vocab = [w for w in vocab if len(w) == word_length]
         self.vocab = vocab
         if not word:
             if not vocab:
                 raise ValueError("Either 'vocab' or 'word' args must be provided.")
             self.word = random.choice(self.vocab)
         else:
+            if word_length is not None and len(word) != word_length:
+                raise ValueError(f'{word!r} is not of length {word_length}.')
             self.word = word
         self.guess_count = 0
 
+    @property
+    def word_length(self):
+        return len(self.word)
+
     @staticmethod
     def assess_guess(candidate_word, hidden_word):
         """
@@ -37,8 +54,9 @@ class Puzzle:
             some combination of WordleColor.BLACK, WordleColor.YELLOW, and
             WordleColor.GREEN
         """
-        if (candidate_word, hidden_word) in Puzzle.assessments:
-            return Puzzle.assessments[candidate_word, hidden_word]
+        code = Puzzle.assessments.get(candidate_word, hidden_word)
+        if code is not None:
+            return code_to_assessment(code, len(candidate_word))
         hidden_counts = {}
         for idx, _ in enumerate(candidate_word):
             if hidden_word[idx] in hidden_counts:
@@ -64,13 +82,48 @@ class Puzzle:
                         solution[idx] = WordleColor.YELLOW
                 
                     hidden_counts[candidate_char] -= 1
-        Puzzle.assessments[(candidate_word, hidden_word)] = solution
+        Puzzle.assessments.put(candidate_word, hidden_word, assessment_to_code(solution))
         return solution
 
+    @staticmethod
+    def assess_matrix(candidate_words, hidden_words):
+        """
+        Assesses every candidate word against every hidden word in one batch.
+        Words may be given as lists of strings or as integer-encoded arrays
+        of shape (num_words, word_length), e.g. from
+        solver.pattern_matrix.encode_words.
+
+        Returns:
+            [array] of shape (len(candidate_words), len(hidden_words)), holding
+            the base-3 pattern code of each assessment (see
+            solver.pattern_matrix.assessment_to_code), exactly matching
+            assess_guess
+        """
+        return assess_encoded(_as_encoded(candidate_words), _as_encoded(hidden_words))
+
+    @staticmethod
+    def assess_many(candidate_word, hidden_words):
+        """
+        Assesses one candidate word (a string or a 1-d encoded array) against
+        many hidden words. Returns an array with one pattern code per hidden
+        word.
+        """
+        if isinstance(candidate_word, str):
+            candidate_word = [candidate_word]
+        else:
+            candidate_word = np.asarray(candidate_word).reshape(1, -1)
+        return Puzzle.assess_matrix(candidate_word, hidden_words)[0]
+
     def assess(self, candidate_word):
         """Performs 'assess_guess' for a specific instance of a puzzle"""
+        if len(candidate_word) != len(self.word):
+            raise ValueError(f'Guess {candidate_word!r} must have {len(self.word)} letters.')
         self.guess_count += 1
         return Puzzle.assess_guess(candidate_word, self.word)
 
     def get_guess_count(self):
         return self.guess_count
+
+
+def _as_encoded(words):
+    return words if isinstance(words, np.ndarray) else encode_words(list(words))
@@ -0,0 +1,229 @@
+"""
+Long-running solver service speaking JSON lines, for tools that drive the
+solver programmatically. The pattern tables are loaded once, and every
+request is answered by a thread pool, so many games can be in progress at
+the same time (over one connection or several).
+
+Each request is one JSON object per line, holding the history of a game so
+far as [guess, feedback] pairs, where feedback uses the letters of the CLI
+(g = GREEN, y = YELLOW, b = BLACK):
+
+    {"id": 1, "history": [["tarse", "bbybb"], ["doily", "bgbbb"]]}
+
+and is answered by one line holding the same id:
+
+    {"id": 1, "guess": "...", "remaining": 12, "solved": false}
+
+Responses are written as soon as they are ready, so they may come back in a
+different order than the requests were sent. Bad requests are answered with
+{"id": ..., "error": "..."}.
+
+    python -m solver.service [--stdio | --unix PATH | --port PORT]
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import os
+import sys
+import solver.pattern_cache as pattern_cache
+import solver.strategy_tree as strategy_tree
+from solver.candidate_set import BucketMasks
+from solver.game_state import GameState
+from solver.pattern_matrix import assessment_to_code
+from solver.solver import InformationTheorySolver, load_vocab_file
+from solver.wordle_color import WordleColor
+
+FEEDBACK_COLORS = {'g': WordleColor.GREEN, 'y': WordleColor.YELLOW, 'b': WordleColor.BLACK}
+# Longest request line accepted by the socket servers
+MAX_LINE_BYTES = 1 << 16
+
+
+class SolverService:
+    """
+    Answers next-guess requests for any number of concurrent games with one
+    shared solver. Requests carry their whole history, so the service keeps
+    no per-game state; states shared between games are cached by the solver.
+    """
+    def __init__(self, solver) -> None:
+        self.solver = solver
+        self.bucket_masks = BucketMasks(solver.pattern_matrix)
+        self._initial_mask = solver.initial_state().mask
+
+    def replay(self, history):
+        """
+        Game state after a history of (guess, feedback) pairs. The
+        candidates are the AND of the bucket bitsets of every turn.
+        """
+        pattern_matrix = self.solver.pattern_matrix
+        mask = self._initial_mask
+        turns = []
+        for guess, feedback in history:
+            guess = guess.lower()
+            if guess not in pattern_matrix.guess_index:
+                raise ValueError(f'Unknown guess {guess!r}.')
+            if len(feedback) != pattern_matrix.word_length or \
+                    any(letter not in FEEDBACK_COLORS for letter in feedback.lower()):
+                raise ValueError(f'Feedback must be {pattern_matrix.word_length} of the letters g, y, b.')
+            code = assessment_to_code([FEEDBACK_COLORS[letter] for letter in feedback.lower()])
+            guess_id = pattern_matrix.guess_index[guess]
+            mask &= self.bucket_masks.mask(guess_id, code)
+            turns.append((guess_id, code))
+        return GameState.from_mask(mask, len(pattern_matrix.answers), turns)
+
+    def next_guess(self, history):
+        """
+        Returns a response dict with the guess to make after `history`, the
+        number of possible solutions remaining and whether the game is over.
+        """
+        pattern_matrix = self.solver.pattern_matrix
+        state = self.replay(history)
+        solved = bool(history) and set(history[-1][1].lower()) == {'g'}
+        if solved:
+            return {'guess': None, 'remaining': len(state), 'solved': True}
+        if not len(state):
+            raise ValueError('No possible solutions are consistent with this history.')
+        if len(state) == 1:
+            guess = pattern_matrix.answers[state.candidate_ids[0]]
+        else:
+            guess = pattern_matrix.guesses[self.solver.next_guess(state)]
+        return {'guess': guess, 'remaining': len(state), 'solved': False}
+
+    def handle_line(self, line):
+        """Answers one request line with one response line"""
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError('Request must be a JSON object.')
+            request_id = request.get('id')
+            history = request.get('history', [])
+            if not isinstance(history, list) or \
+                    any(not isinstance(turn, list) or len(turn) != 2 or
+                        not all(isinstance(part, str) for part in turn) for turn in history):
+                raise ValueError('History must be a list of [guess, feedback] pairs.')
+            response = self.next_guess(history)
+        except ValueError as error:
+            # json.JSONDecodeError is a ValueError too
+            response = {'error': str(error)}
+        return json.dumps({'id': request_id, **response})
+
+
+async def _answer(service, executor, line, write):
+    loop = asyncio.get_running_loop()
+    write(await loop.run_in_executor(executor, service.handle_line, line))
+
+
+async def _serve_stream(service, executor, reader, write):
+    """Answers every line from `reader` concurrently until it is closed"""
+    pending = set()
+    while True:
+        try:
+            line = await reader.readline()
+        except ValueError:
+            write(json.dumps({'id': None, 'error': 'Request line too long.'}))
+            break
+        if not line:
+            break
+        if not line.strip():
+            continue
+        task = asyncio.ensure_future(_answer(service, executor, line, write))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    if pending:
+        await asyncio.wait(pending)
+
+
+async def serve_socket(service, executor, unix_path=None, host='127.0.0.1', port=8765):
+    """Serves connections on a Unix socket (if unix_path is given) or over TCP"""
+    async def handle_connection(reader, writer):
+        def write(response):
+            writer.write(response.encode('utf-8') + b'\n')
+        try:
+            await _serve_stream(service, executor, reader, write)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    if unix_path:
+        server = await asyncio.start_unix_server(handle_connection, unix_path, limit=MAX_LINE_BYTES)
+    else:
+        server = await asyncio.start_server(handle_connection, host, port, limit=MAX_LINE_BYTES)
+    async with server:
+        await server.serve_forever()
+
+
+async def serve_stdio(service, executor):
+    """Serves requests from stdin, writing responses to stdout, until EOF"""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=MAX_LINE_BYTES)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+    def write(response):
+        sys.stdout.write(response + '\n')
+        sys.stdout.flush()
+    await _serve_stream(service, executor, reader, write)
+
+
+def load_service(official_words, hidden_words, cache_path=None, use_tree=True, word_length=None,
+                 cache_dir=None):
+    """
+    Builds a SolverService, loading (or building) the pattern cache, which is
+    the one for these word lists in cache_dir unless cache_path is given
+    """
+    vocab = load_vocab_file(official_words, word_length)
+    possible_solutions = load_vocab_file(hidden_words, word_length)
+    tree = None
+    if use_tree:
+        try:
+            tree = strategy_tree.load_strategy_tree(strategy_tree.DEFAULT_TREE_PATH, vocab,
+                                                    possible_solutions)
+        except (OSError, ValueError):
+            tree = None
+    return SolverService(InformationTheorySolver(vocab, possible_solutions, cache_path=cache_path,
+                                                 strategy_tree=tree,
+                                                 cache_dir=cache_dir or pattern_cache.DEFAULT_CACHE_DIR))
+
+
+def main():
+    package_dir = os.path.dirname(__file__)
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    transport = parser.add_mutually_exclusive_group()
+    transport.add_argument('--stdio', action='store_true', help='Serve stdin/stdout (the default)')
+    transport.add_argument('--unix', metavar='PATH', help='Serve on a Unix socket')
+    transport.add_argument('--port', type=int, help='Serve over TCP on this port')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='Threads answering requests')
+    parser.add_argument('--official-words', default=os.path.join(package_dir, 'official_words.txt'))
+    parser.add_argument('--hidden-words', default=os.path.join(package_dir, 'hidden_words.txt'))
+    parser.add_argument('--word-length', type=int,
+                        help='Only use the words of this length from the word lists')
+    parser.add_argument('--cache-path',
+                        help='Pattern cache to load (or build) for the word lists, instead of '
+                             'the one in --cache-dir')
+    parser.add_argument('--cache-dir', default=pattern_cache.DEFAULT_CACHE_DIR,
+                        help='Directory of the pattern caches (one per dictionary)')
+    parser.add_argument('--no-tree', action='store_true', help='Do not use the strategy tree')
+    args = parser.parse_args()
+
+    service = load_service(args.official_words, args.hidden_words, args.cache_path,
+                           use_tree=not args.no_tree, word_length=args.word_length,
+                           cache_dir=args.cache_dir)
+    with concurrent.futures.ThreadPoolExecutor(args.workers) as executor:
+        if args.unix or args.port is not None:
+            server = serve_socket(service, executor, unix_path=args.unix, host=args.host,
+                                  port=args.port)
+        else:
+            server = serve_stdio(service, executor)
+        try:
+            asyncio.run(server)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
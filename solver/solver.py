@@ -1,78 +1,305 @@
-from solver.wordle_color import WordleColor
 import abc
+import threading
+import time
+import numpy as np
 import solver.information as information
+import solver.pattern_cache as pattern_cache
+from solver.cache_manager import ensure_pattern_cache
+from solver.puzzle import Puzzle
+from solver.game_state import GameState
+from solver.hard_mode import HardModeIndex
+from solver.pattern_matrix import PatternMatrix, assessment_to_code
 
 
 class InformationBasedSolver(object, metaclass=abc.ABCMeta):
     """
     A wordle solver that makes use of information in its solution. Includes
-    checking for pre-computed information in constructor (and computing it
-    if a path is not provided - NOTE - this takes a while).
+    checking for a pre-computed pattern cache in constructor (and computing
+    it if a path is not provided - NOTE - this takes a while).
+
+    Words may be of any (single) length; with word_length given, vocab and
+    possible_solutions are first narrowed to the words of that length. With
+    cache_dir given instead of cache_path, the pattern cache is the one for
+    these exact word lists in that directory (see
+    pattern_cache.cache_path_for), built on first use.
+
+    Without a cache, the patterns of every guess against the possible
+    solutions are computed on first use, a block of guesses at a time (see
+    PatternMatrix.lazy), keeping at most memory_budget bytes of them (all
+    of them when None); so is the information of the first guess.
+
+    With hard_mode set, every guess after the first is chosen among the
+    guesses consistent with all the feedback so far (see HardModeIndex).
+    Strategy trees are built for normal play, so they cannot be used in hard
+    mode.
     """
-    def __init__(self, vocab, possible_solutions, pattern_path=None, information_path=None):
+    # Upper bound on the number of states whose chosen guess is cached
+    max_cached_states = 1 << 16
+    # Whether state_information only scores guesses which could change the
+    # choice of a get_guess picking the first guess with the most information,
+    # for states of at most prune_max_candidates candidates (at most 11, see
+    # information.distinct_partitions)
+    prune_guess_pool = False
+    prune_max_candidates = 11
+
+    def __init__(self, vocab, possible_solutions, *, cache_path=None, strategy_tree=None,
+                 word_length=None, cache_dir=None, hard_mode=False, memory_budget=None):
+        if word_length is not None:
+            vocab = [word for word in vocab if len(word) == word_length]
+            possible_solutions = [word for word in possible_solutions if len(word) == word_length]
+            if not possible_solutions:
+                raise ValueError(f'No possible solutions of length {word_length}.')
         self.vocab = vocab
         # This is all for the purpose of avoiding the expensive operation of computing information
         # for the entire vocab
         self.possible_solutions = possible_solutions
-        pattern_path_without_information_path = pattern_path is not None and information_path is None
-        information_path_without_pattern_path = pattern_path is None and information_path is not None
-        if pattern_path_without_information_path or information_path_without_pattern_path:
-            raise ValueError("If one of [information_path, pattern_path] is provided, " + \
-                             "the other must be provided as well.")
-        if information_path:
-            self.pattern_frequencies = information.compute_pattern_frequencies(
-                vocab, vocab, pattern_path)
-            self.information = information.compute_information_from_frequencies(
-                self.pattern_frequencies, vocab, information_path)
+        if cache_path is None and cache_dir is not None:
+            cache_path = pattern_cache.cache_path_for(vocab, possible_solutions, cache_dir)
+        if cache_path:
+            self.pattern_matrix, self._information = self._load_cache(cache_path)
         else:
-            self.pattern_frequencies = information.compute_pattern_frequencies(
-                vocab, vocab)
-            self.information = information.compute_information_from_frequencies(
-                self.pattern_frequencies, vocab)
+            self.pattern_matrix = PatternMatrix.lazy(vocab, possible_solutions, memory_budget)
+            self._information = None
+        self._guess_cache = {}
+        self._guess_cache_lock = threading.Lock()
+        self.strategy_tree = strategy_tree
+        if strategy_tree is not None:
+            if hard_mode:
+                raise ValueError('Strategy trees cannot be used in hard mode.')
+            strategy_tree.check(self.pattern_matrix.guesses, self.pattern_matrix.answers)
+        self.hard_mode = hard_mode
+        self.hard_mode_index = HardModeIndex(self.pattern_matrix.guesses) if hard_mode else None
+
+    def _load_cache(self, cache_path):
+        """
+        Loads the pattern matrix and information from a pattern cache file,
+        building the cache (over vocab x possible_solutions) if it does not
+        exist yet. Processes building the same cache at once wait for the
+        first one instead of building it again.
+
+        The stored information is over every answer of the cache, so it is
+        only kept if those answers are exactly the possible solutions.
+        Otherwise, the information property computes it again.
+        """
+        ensure_pattern_cache(cache_path, self.vocab, self.possible_solutions)
+        pattern_matrix, word_information = pattern_cache.load_pattern_cache(
+            cache_path, guesses=self.vocab)
+        missing = [word for word in self.possible_solutions if word not in pattern_matrix.answer_index]
+        if missing:
+            raise ValueError(f'{cache_path} is missing {len(missing)} possible solutions, ' + \
+                             f'e.g. {missing[:5]}.')
+        if len(pattern_matrix.answers) != len(set(self.possible_solutions)):
+            word_information = None
+        return pattern_matrix, word_information
+
+    @property
+    def information(self):
+        """Information of every guess over every possible solution (the first turn)"""
+        if self._information is None:
+            self._information = information.compute_information(
+                self.pattern_matrix.matrix, self.initial_state().candidate_ids)
+        return self._information
+
+    @property
+    def word_length(self):
+        return self.pattern_matrix.word_length
+
+    def __getstate__(self):
+        # Locks cannot be pickled (solvers are sent to AssessSolver workers)
+        state = self.__dict__.copy()
+        del state['_guess_cache_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._guess_cache_lock = threading.Lock()
 
     @abc.abstractmethod
     def get_guess(self, word_information):
+        """
+        Chooses the next guess, given an array holding the information of
+        every guess in self.pattern_matrix.guesses (words that have already
+        been guessed hold -inf). Returns the id (row) of the chosen guess.
+        """
         pass
 
-    def solve(self, puzzle):
+    def initial_state(self):
+        """State at the start of a game: every possible solution remains"""
+        return GameState(np.sort(self.pattern_matrix.answer_ids(self.possible_solutions)))
+
+    def state_information(self, state, prune=None):
+        """
+        Information of every guess in the given state, with guesses that
+        were already made set to -inf. The first turn uses the precomputed
+        self.information.
+
+        If prune_guess_pool is set, only the guesses in state.guess_ids are
+        scored, and state.guess_ids is replaced (the only change made to the
+        state) by the first guess of every distinct partition of the candidates (see
+        information.distinct_partitions). Every other guess is set to -inf:
+        it either has no information, or exactly the information of an
+        earlier guess, so the first guess with the most information is
+        unchanged. As the candidates shrink, so does the pool.
+
+        In hard mode, only the guesses still legal are scored (and the pool
+        is not kept, since a guess dropped as a duplicate of another may
+        stay legal longer than it).
+
+        prune overrides prune_guess_pool when given.
+        """
+        if not state.history:
+            return np.array(self.information, dtype=float)
+        guess_ids = state.guess_ids
+        if self.hard_mode:
+            guess_ids = self.hard_mode_index.legal_ids(state.history)
+        if prune is None:
+            prune = self.prune_guess_pool
+        prune = prune and 1 < len(state) <= self.prune_max_candidates
+        if guess_ids is None and not prune:
+            word_information = information.compute_information(
+                self.pattern_matrix.matrix, state.candidate_ids)
+            word_information[state.guessed_ids] = -np.inf
+            return word_information
+        matrix = self.pattern_matrix.matrix
+        if guess_ids is None:
+            codes = np.take(matrix, state.candidate_ids, axis=1)
+        else:
+            codes = matrix[np.ix_(guess_ids, state.candidate_ids)]
+        if prune:
+            keep = information.distinct_partitions(codes)
+            codes = codes[keep]
+            guess_ids = keep if guess_ids is None else guess_ids[keep]
+            if not self.hard_mode:
+                state.guess_ids = guess_ids
+        word_information = np.full(len(matrix), -np.inf)
+        word_information[guess_ids] = information.compute_information(codes, np.arange(len(state)))
+        return word_information
+
+    def next_guess(self, state):
+        """
+        Returns the id of the guess to make in the given state. States found
+        in the strategy tree (if one was provided) are answered by a lookup.
+        Otherwise, choices are cached by state key, so states shared between
+        games (or reached again later) are only scored once. Guesses already
+        made have no information once two or more candidates remain, so the
+        choice only depends on the candidates and the key can ignore the
+        history (except, in hard mode, for the guesses it leaves legal).
+
+        Safe to call from several threads at once. Two threads missing the
+        cache for the same state both score it, and store the same guess.
+        """
+        return self._choose_guess(state)[0]
+
+    def _choose_guess(self, state):
+        """next_guess, also returning where the guess came from: 'tree', 'cache' or 'computed'"""
+        if self.strategy_tree is not None:
+            node = self.strategy_tree.lookup(state.candidate_ids)
+            if node is not None:
+                return self.strategy_tree.guess(node), 'tree'
+        if not state.history:
+            return self.get_guess(self.state_information(state)), 'computed'
+        key = state.key
+        if self.hard_mode:
+            key = (key, self.hard_mode_index.legal_mask(state.history))
+        guess_id = self._guess_cache.get(key)
+        if guess_id is not None:
+            return guess_id, 'cache'
+        guess_id = self.get_guess(self.state_information(state))
+        with self._guess_cache_lock:
+            if len(self._guess_cache) >= self.max_cached_states:
+                del self._guess_cache[next(iter(self._guess_cache))]
+            self._guess_cache[key] = guess_id
+        return guess_id, 'computed'
+
+    def solve(self, puzzle, on_turn=None):
         """
         Function stub to solve inputted puzzle. Implementation
         depends on subclass.
 
         :param puzzle:
             Puzzle object that we wish to solve with the given solver.
+        :param on_turn:
+            Optional callable, called after every turn with a dict
+            describing it (see solver.instrumentation.TURN_FIELDS). Nothing
+            is measured when it is None.
         """
-        correct_sol = [WordleColor.GREEN] * 5
-        assessment = None
+        pattern_matrix = self.pattern_matrix
         guesses = []
-        possible_vocab = set(self.possible_solutions)
-        pattern_frequencies = self.pattern_frequencies
-        word_information = self.information
-        while assessment != correct_sol:
-            guess = self.get_guess(word_information)
+        state = self.initial_state()
+        while True:
+            if on_turn is not None:
+                turn = _start_turn(puzzle, state, len(guesses) + 1)
+            guess_id, source = self._choose_guess(state)
+            if on_turn is not None:
+                turn['information_seconds'] = time.perf_counter() - turn['start']
+            guess = pattern_matrix.guesses[guess_id]
             guesses.append(guess)
-            assessment = puzzle.assess(guess)
-            
+            code = assessment_to_code(puzzle.assess(guess))
+            if code == pattern_matrix.all_green_code:
+                if on_turn is not None:
+                    on_turn(_end_turn(turn, guess, source, 1, 0.0))
+                break
+
             # Subset vocab to only what is possible based on feedback
-            possible_vocab = possible_vocab.intersection(set(self.filter_on_assessment(guess, assessment))) - set(guesses)
-            if assessment == correct_sol: break
-            if len(possible_vocab) == 1:
-                puzzle.assess(guess)
-                guesses.append(list(possible_vocab)[0])
+            if on_turn is not None:
+                filter_start = time.perf_counter()
+            state = state.narrow(pattern_matrix, guess_id, code)
+            if on_turn is not None:
+                on_turn(_end_turn(turn, guess, source, len(state), time.perf_counter() - filter_start))
+            if len(state) == 1:
+                if on_turn is not None:
+                    turn = _start_turn(puzzle, state, len(guesses) + 1)
+                    turn['information_seconds'] = 0.0
+                last_guess = pattern_matrix.answers[state.candidate_ids[0]]
+                puzzle.assess(last_guess)
+                guesses.append(last_guess)
+                if on_turn is not None:
+                    on_turn(_end_turn(turn, last_guess, 'last', 1, 0.0))
                 break
-            pattern_frequencies = information.compute_pattern_frequencies(self.vocab, possible_vocab)
-            word_information = information.compute_information_from_frequencies(pattern_frequencies, possible_vocab)
-            for g in guesses:
-                del word_information[g]
-        
+
         return guesses
 
+    def solve_many(self, puzzles):
+        """
+        Solves several puzzles at once, moving every game forward one turn
+        at a time. Games which got the same feedback to the same guesses are
+        in the same state, so each distinct state is narrowed, and its next
+        guess chosen, once for all of its games. Returns the guesses of
+        every puzzle, in order, exactly as solve would.
+        """
+        pattern_matrix = self.pattern_matrix
+        all_guesses = [[] for _ in puzzles]
+        # (state, indices of the games in it)
+        groups = [(self.initial_state(), list(range(len(puzzles))))]
+        while groups:
+            next_groups = []
+            for state, games in groups:
+                guess_id = self._choose_guess(state)[0]
+                guess = pattern_matrix.guesses[guess_id]
+                buckets = {}
+                for game in games:
+                    all_guesses[game].append(guess)
+                    code = assessment_to_code(puzzles[game].assess(guess))
+                    if code != pattern_matrix.all_green_code:
+                        buckets.setdefault(code, []).append(game)
+                for code, bucket in buckets.items():
+                    next_state = state.narrow(pattern_matrix, guess_id, code)
+                    if len(next_state) == 1:
+                        last_guess = pattern_matrix.answers[next_state.candidate_ids[0]]
+                        for game in bucket:
+                            puzzles[game].assess(last_guess)
+                            all_guesses[game].append(last_guess)
+                    else:
+                        next_groups.append((next_state, bucket))
+            groups = next_groups
+        return all_guesses
+
     def filter_on_assessment(self, guessed_word, assessment):
         """
         Filters vocab based on which words could be possible, given
         a guessed word and an assessment of that guessed word.
         """
-        return list(self.pattern_frequencies[guessed_word][tuple(assessment)])
+        return self.pattern_matrix.bucket(guessed_word, assessment)
 
 class InformationTheorySolver(InformationBasedSolver):
     """
@@ -80,14 +307,47 @@ class InformationTheorySolver(InformationBasedSolver):
     to narrow the guesses down to exactly one choice, since it typically 
     guesses uncommon words.
     """
-    def __init__(self, vocab, possible_solutions, pattern_path=None, information_path=None) -> None:
-        super().__init__(vocab, possible_solutions, pattern_path, information_path)
+    prune_guess_pool = True
+
+    def __init__(self, vocab, possible_solutions, *, cache_path=None, strategy_tree=None,
+                 word_length=None, cache_dir=None, hard_mode=False, memory_budget=None) -> None:
+        super().__init__(vocab, possible_solutions, cache_path=cache_path, strategy_tree=strategy_tree,
+                         word_length=word_length, cache_dir=cache_dir, hard_mode=hard_mode,
+                         memory_budget=memory_budget)
 
     def get_guess(self, word_information):
         """Returns guess containing most information"""
-        return max(word_information, key=word_information.get)
+        return int(np.argmax(word_information))
 
-def load_vocab_file(path):
+def _start_turn(puzzle, state, turn_number):
+    cache = Puzzle.assessments
+    return {'word': puzzle.word, 'turn': turn_number, 'candidates_before': len(state),
+            'hits': cache.hits + cache.matrix_hits, 'misses': cache.misses,
+            'start': time.perf_counter()}
+
+def _end_turn(turn, guess, source, candidates_after, filter_seconds):
+    cache = Puzzle.assessments
+    return {
+        'word': turn['word'],
+        'turn': turn['turn'],
+        'guess': guess,
+        'guess_source': source,
+        'candidates_before': turn['candidates_before'],
+        'candidates_after': candidates_after,
+        'information_seconds': turn['information_seconds'],
+        'filter_seconds': filter_seconds,
+        'assessment_cache_hits': cache.hits + cache.matrix_hits - turn['hits'],
+        'assessment_cache_misses': cache.misses - turn['misses'],
+    }
+
+def load_vocab_file(path, word_length=None):
+    """
+    Loads a word list, one word per line. With word_length given, only the
+    words of that length are kept, so one dictionary file can hold words of
+    several lengths.
+    """
     with open(path, 'r', encoding='UTF-8') as file:
         vocab = [w.strip() for w in file.readlines()]
+    if word_length is not None:
+        vocab = [w for w in vocab if len(w) == word_length]
     return vocab
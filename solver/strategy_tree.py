@@ -0,0 +1,191 @@
+import argparse
+import hashlib
+import os
+import numpy as np
+import solver.pattern_cache as pattern_cache
+from solver.pattern_cache import hash_words
+
+FORMAT_VERSION = 1
+# Number of ranked guesses stored per node, for "other good guesses" lists
+DEFAULT_TOP_K = 5
+DEFAULT_TREE_PATH = os.path.join(os.path.dirname(__file__), 'data', 'strategy_tree.npz')
+
+
+def state_digest(candidate_ids):
+    """Compact digest identifying a set of candidate answer ids"""
+    candidate_ids = np.sort(np.asarray(candidate_ids, dtype='<i4'))
+    return hashlib.blake2b(candidate_ids.tobytes(), digest_size=16).digest()
+
+
+class StrategyTree:
+    """
+    The complete decision tree of a deterministic solver over its possible
+    solutions: the guess made at the start of the game, then the guess made
+    for every feedback, and so on. Node 0 is the start of the game.
+
+    Nodes are only stored for states in which the solver has to choose
+    between two or more candidates. Every node is indexed by a digest of its
+    candidates, so any reachable state can be answered with one lookup,
+    whatever path led to it.
+
+    Per node, the tree stores the chosen guess, the top_k guesses ranked by
+    information (ties in word order) along with their information, and the
+    preferred guess: the first guess tied for the most information that
+    could also be the solution (used by the CLI).
+    """
+    def __init__(self, guesses_hash, answers_hash, digests, guesses, preferred, rankings,
+                 information, edges) -> None:
+        self.guesses_hash = guesses_hash
+        self.answers_hash = answers_hash
+        self.digests = digests
+        self.guesses = guesses
+        self.preferred = preferred
+        self.rankings = rankings
+        self.information = information
+        # (parent, code, child) triples, sorted by parent
+        self.edges = edges
+        self._index = {bytes(digest): node for node, digest in enumerate(digests)}
+
+    def __len__(self):
+        return len(self.guesses)
+
+    def check(self, guesses, answers):
+        """Raises a ValueError if the tree was built from other word lists"""
+        if hash_words(guesses) != self.guesses_hash or hash_words(answers) != self.answers_hash:
+            raise ValueError('Strategy tree was built from different word lists.')
+
+    def lookup(self, candidate_ids):
+        """Node for the state with the given candidates, or None if off the tree"""
+        return self._index.get(state_digest(candidate_ids))
+
+    def guess(self, node):
+        """Id of the guess the solver makes at a node"""
+        return int(self.guesses[node])
+
+    def preferred_guess(self, node):
+        """
+        Id of the first guess tied for the most information at a node that
+        could be the solution, or of the first tied guess if none could be
+        """
+        return int(self.preferred[node])
+
+    def ranking(self, node):
+        """List of (guess id, information) for the best guesses at a node"""
+        return list(zip(self.rankings[node].tolist(), self.information[node].tolist()))
+
+    def children(self, node):
+        """Dictionary of {pattern code: child node} for a node"""
+        start, end = np.searchsorted(self.edges[:, 0], [node, node + 1])
+        return {int(code): int(child) for _, code, child in self.edges[start:end]}
+
+
+def _preferred_guess(pattern_matrix, state, word_information):
+    tied = np.flatnonzero(word_information == word_information.max())
+    candidate_words = set(pattern_matrix.answers[idx] for idx in state.candidate_ids)
+    for guess_id in tied:
+        if pattern_matrix.guesses[guess_id] in candidate_words:
+            return guess_id
+    return tied[0]
+
+
+def build_strategy_tree(solver, top_k=DEFAULT_TOP_K):
+    """
+    Plays out every reachable state of a solver (breadth first, starting
+    from solver.initial_state()) and records its choices as a StrategyTree.
+    Every guess is scored, even if the solver prunes its guess pool, so
+    that rankings and preferred guesses never skip pruned guesses.
+    """
+    pattern_matrix = solver.pattern_matrix
+    states = [solver.initial_state()]
+    digests, guesses, preferred, rankings, information, edges = [], [], [], [], [], []
+    node = 0
+    while node < len(states):
+        state = states[node]
+        word_information = solver.state_information(state, prune=False)
+        guess_id = solver.get_guess(word_information)
+        ranking = np.argsort(-word_information, kind='stable')[:top_k]
+        digests.append(state_digest(state.candidate_ids))
+        guesses.append(guess_id)
+        preferred.append(_preferred_guess(pattern_matrix, state, word_information))
+        rankings.append(ranking)
+        information.append(word_information[ranking])
+        for code in np.unique(pattern_matrix.matrix[guess_id, state.candidate_ids]):
+            if code == pattern_matrix.all_green_code:
+                continue
+            child = state.narrow(pattern_matrix, guess_id, int(code))
+            if len(child) > 1:
+                edges.append((node, int(code), len(states)))
+                states.append(child)
+        node += 1
+    return StrategyTree(
+        hash_words(pattern_matrix.guesses), hash_words(pattern_matrix.answers),
+        np.array([np.frombuffer(digest, dtype=np.uint8) for digest in digests]),
+        np.array(guesses, dtype=np.int32),
+        np.array(preferred, dtype=np.int32),
+        np.array(rankings, dtype=np.int32),
+        np.array(information, dtype=np.float64),
+        np.array(edges, dtype=np.int32).reshape(-1, 3))
+
+
+def save_strategy_tree(path, tree):
+    """Writes a StrategyTree as a compressed .npz archive (no pickled objects)"""
+    with open(path, 'wb') as handle:
+        np.savez_compressed(
+            handle,
+            version=np.array(FORMAT_VERSION),
+            guesses_hash=np.frombuffer(tree.guesses_hash, dtype=np.uint8),
+            answers_hash=np.frombuffer(tree.answers_hash, dtype=np.uint8),
+            digests=tree.digests,
+            guesses=tree.guesses,
+            preferred=tree.preferred,
+            rankings=tree.rankings,
+            information=tree.information,
+            edges=tree.edges)
+
+
+def load_strategy_tree(path, guesses=None, answers=None):
+    """
+    Loads a StrategyTree written by save_strategy_tree. If guesses and
+    answers are provided, the tree is checked against them.
+    """
+    with np.load(path, allow_pickle=False) as archive:
+        if int(archive['version']) != FORMAT_VERSION:
+            raise ValueError(f'{path} has strategy tree version {int(archive["version"])}, ' + \
+                             f'expected {FORMAT_VERSION}.')
+        tree = StrategyTree(
+            archive['guesses_hash'].tobytes(), archive['answers_hash'].tobytes(),
+            archive['digests'], archive['guesses'], archive['preferred'], archive['rankings'],
+            archive['information'], archive['edges'])
+    if guesses is not None and answers is not None:
+        tree.check(guesses, answers)
+    return tree
+
+
+def main():
+    from solver.solver import InformationTheorySolver, load_vocab_file
+    package_dir = os.path.dirname(__file__)
+    parser = argparse.ArgumentParser(
+        description='Builds the strategy tree of InformationTheorySolver over the hidden words.')
+    parser.add_argument('--official-words', default=os.path.join(package_dir, 'official_words.txt'))
+    parser.add_argument('--hidden-words', default=os.path.join(package_dir, 'hidden_words.txt'))
+    parser.add_argument('--cache-path',
+                        help='Pattern cache to load (or build) for the word lists, instead of '
+                             'the one in --cache-dir')
+    parser.add_argument('--cache-dir', default=pattern_cache.DEFAULT_CACHE_DIR,
+                        help='Directory of the pattern caches (one per dictionary)')
+    parser.add_argument('--out', default=DEFAULT_TREE_PATH)
+    parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K)
+    args = parser.parse_args()
+
+    vocab = load_vocab_file(args.official_words)
+    hidden_words = load_vocab_file(args.hidden_words)
+    info_solver = InformationTheorySolver(vocab, hidden_words, cache_path=args.cache_path,
+                                          cache_dir=args.cache_dir)
+    tree = build_strategy_tree(info_solver, top_k=args.top_k)
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    save_strategy_tree(args.out, tree)
+    print(f'Wrote {len(tree)} nodes to {args.out}')
+
+
+if __name__ == '__main__':
+    main()
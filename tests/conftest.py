@@ -0,0 +1,57 @@
+import os
+import pytest
+import solver
+from solver.solver import load_vocab_file
+
+# Word lists shipped with the package
+WORD_LISTS_DIR = os.path.dirname(solver.__file__)
+
+
+@pytest.fixture
+def chimp_vocab():
+    return [
+        'CHIMP',
+        'CATCH',
+        'PATCH',
+        'MATCH',
+        'HATCH'
+    ]
+
+@pytest.fixture
+def lower_chimp_vocab(chimp_vocab):
+    """chimp_vocab in lowercase, as in the word lists"""
+    return [word.lower() for word in chimp_vocab]
+
+@pytest.fixture
+def repeated_letter_vocab():
+    return [
+        'panda',
+        'spark',
+        'sigma',
+        'waist',
+        'wings',
+        'llama',
+        'allay',
+        'label',
+        'ladle'
+    ]
+
+@pytest.fixture(scope='session')
+def hidden_words():
+    return load_vocab_file(os.path.join(WORD_LISTS_DIR, 'hidden_words.txt'))
+
+@pytest.fixture(scope='session')
+def official_words():
+    return load_vocab_file(os.path.join(WORD_LISTS_DIR, 'official_words.txt'))
+
+@pytest.fixture
+def small_vocab(request, hidden_words, official_words):
+    """
+    (guesses, answers) sampled from the word lists: every 10th hidden word,
+    then every 20th official word that is not one of them. Modules can
+    sample other strides with
+    pytest.mark.parametrize('small_vocab', [(answer stride, guess stride)], indirect=True).
+    """
+    answer_stride, guess_stride = getattr(request, 'param', (10, 20))
+    answers = hidden_words[::answer_stride]
+    return answers + [word for word in official_words[::guess_stride] if word not in answers], answers
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from solver.pattern_matrix import assessment_to_code, encode_words
+from solver.puzzle import Puzzle
+
+hypothesis = pytest.importorskip('hypothesis')
+st = hypothesis.strategies
+
+# A small alphabet makes repeated letters (the tricky case) very likely
+words_of_length = lambda length: st.text(alphabet='abcd', min_size=length, max_size=length)
+word_lists = st.integers(min_value=1, max_value=7).flatmap(
+    lambda length: st.tuples(st.lists(words_of_length(length), min_size=1, max_size=8),
+                             st.lists(words_of_length(length), min_size=1, max_size=8)))
+
+
+@hypothesis.given(word_lists)
+def test_assess_matrix_matches_assess_guess(words):
+    candidate_words, hidden_words = words
+    codes = Puzzle.assess_matrix(candidate_words, hidden_words)
+    for i, candidate_word in enumerate(candidate_words):
+        for j, hidden_word in enumerate(hidden_words):
+            assert codes[i, j] == assessment_to_code(Puzzle.assess_guess(candidate_word, hidden_word))
+
+@hypothesis.given(word_lists)
+def test_assess_many_matches_assess_matrix(words):
+    candidate_words, hidden_words = words
+    expected = Puzzle.assess_matrix(candidate_words, hidden_words)[0]
+    assert np.array_equal(Puzzle.assess_many(candidate_words[0], hidden_words), expected)
+    encoded = encode_words(candidate_words + hidden_words)
+    assert np.array_equal(Puzzle.assess_many(encoded[0], encoded[len(candidate_words):]), expected)
+
+def test_assess_many_example():
+    assert Puzzle.assess_many('panda', ['spark', 'sigma', 'panda']).tolist() == [
+        assessment_to_code(Puzzle.assess_guess('panda', 'spark')),
+        assessment_to_code(Puzzle.assess_guess('panda', 'sigma')),
+        242
+    ]
@@ -0,0 +1,72 @@
+import pickle
+import numpy as np
+import pytest
+from solver.assess_solver import AssessmentSummary, AssessSolver, read_results
+from solver.pattern_cache import load_pattern_cache
+from solver.puzzle import Puzzle
+from solver.solver import InformationTheorySolver
+
+
+def test_assess_serial(chimp_vocab):
+    assessor = AssessSolver(chimp_vocab)
+    guesses = assessor.assess(InformationTheorySolver(chimp_vocab, chimp_vocab))
+    assert list(guesses) == chimp_vocab
+    assert guesses['CHIMP'] == ['CHIMP']
+    assert assessor.guess_distribution == {1: 1, 2: 4}
+
+def test_assess_detaches_pattern_matrix(chimp_vocab):
+    """The assessment cache must not keep the solver's pattern matrix alive afterwards"""
+    attached = Puzzle.assessments.pattern_matrix
+    info_theory_solver = InformationTheorySolver(chimp_vocab, chimp_vocab)
+    AssessSolver(chimp_vocab).assess(info_theory_solver)
+    assert Puzzle.assessments.pattern_matrix is attached
+    def failing_solve_many(puzzles):
+        raise RuntimeError('solver failed')
+    info_theory_solver.solve_many = failing_solve_many
+    with pytest.raises(RuntimeError):
+        AssessSolver(chimp_vocab).assess(info_theory_solver)
+    assert Puzzle.assessments.pattern_matrix is attached
+
+def test_assess_parallel_matches_serial(tmp_path, chimp_vocab):
+    """Parallel assessment (sharing a memory-mapped cache) must match a serial run"""
+    info_theory_solver = InformationTheorySolver(chimp_vocab, chimp_vocab,
+                                                 cache_path=tmp_path / 'patterns.bin')
+    serial = AssessSolver(chimp_vocab)
+    parallel = AssessSolver(chimp_vocab)
+    assert parallel.assess(info_theory_solver, processes=2) == serial.assess(info_theory_solver)
+    assert parallel.guess_distribution == serial.guess_distribution
+
+def test_memory_mapped_matrix_pickles_by_reference(tmp_path, chimp_vocab):
+    path = tmp_path / 'patterns.bin'
+    InformationTheorySolver(chimp_vocab, chimp_vocab, cache_path=path)
+    pattern_matrix, _ = load_pattern_cache(path)
+    unpickled = pickle.loads(pickle.dumps(pattern_matrix))
+    assert isinstance(unpickled.matrix, np.memmap)
+    assert np.array_equal(unpickled.matrix, pattern_matrix.matrix)
+
+def test_assess_streams_results(tmp_path, chimp_vocab):
+    output = tmp_path / 'results.jsonl'
+    assessor = AssessSolver(chimp_vocab)
+    guesses = assessor.assess(InformationTheorySolver(chimp_vocab, chimp_vocab), output=output)
+    records = list(read_results(output))
+    assert {record['word']: record['guesses'] for record in records} == guesses
+    summary = AssessmentSummary.from_file(output)
+    assert summary.distribution == assessor.guess_distribution
+    assert summary.average == pytest.approx(9 / 5)
+
+def test_assess_resumes(tmp_path, chimp_vocab):
+    """A run cut short mid-record resumes where it stopped, with the same results"""
+    info_theory_solver = InformationTheorySolver(chimp_vocab, chimp_vocab)
+    output = tmp_path / 'results.jsonl'
+    expected = AssessSolver(chimp_vocab).assess(info_theory_solver, output=output)
+    lines = output.read_text().splitlines(keepends=True)
+    output.write_text(''.join(lines[:2]) + lines[2][:10])
+
+    solved = []
+    info_theory_solver.solve = lambda puzzle, on_turn=None, solve=info_theory_solver.solve: \
+        solved.append(puzzle.word) or solve(puzzle, on_turn)
+    assessor = AssessSolver(chimp_vocab)
+    assert assessor.assess(info_theory_solver, output=output, resume=True) == expected
+    assert solved == chimp_vocab[2:]
+    assert [record['word'] for record in read_results(output)] == chimp_vocab
+    assert assessor.guess_distribution == {1: 1, 2: 4}
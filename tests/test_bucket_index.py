@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+import solver.information as information
+from solver.bucket_index import BucketIndex
+from solver.pattern_matrix import PatternMatrix, assessment_to_code
+from solver.puzzle import Puzzle
+
+
+def test_counts_match_buckets(repeated_letter_vocab):
+    """Every bucket size is the number of words giving that pattern"""
+    pattern_matrix = PatternMatrix(repeated_letter_vocab, repeated_letter_vocab)
+    index = BucketIndex.from_pattern_matrix(pattern_matrix)
+    assert index.counts.shape == (len(repeated_letter_vocab), 243)
+    assert index.num_candidates == len(repeated_letter_vocab)
+    for guess in repeated_letter_vocab:
+        histogram = index.histogram(guess)
+        for answer in repeated_letter_vocab:
+            assessment = Puzzle.assess_guess(guess, answer)
+            assert histogram[assessment_to_code(assessment)] == \
+                len(pattern_matrix.bucket(guess, assessment))
+        buckets = index.buckets(guess)
+        assert sum(size for _, size in buckets) == len(repeated_letter_vocab)
+        assert [size for _, size in buckets] == sorted((size for _, size in buckets), reverse=True)
+    assert np.array_equal(index.histogram(2), index.histogram('sigma'))
+
+def test_queries(repeated_letter_vocab):
+    pattern_matrix = PatternMatrix(repeated_letter_vocab, repeated_letter_vocab)
+    candidate_ids = np.array([0, 2, 5, 6, 7])
+    index = BucketIndex.from_pattern_matrix(pattern_matrix, candidate_ids)
+    assert np.array_equal(index.information(),
+                          information.compute_information(pattern_matrix.matrix, candidate_ids))
+    sizes = [[size for _, size in index.buckets(guess)] for guess in repeated_letter_vocab]
+    assert index.worst_case().tolist() == [max(bucket_sizes) for bucket_sizes in sizes]
+    assert np.allclose(index.expected_size(), [sum(size ** 2 for size in bucket_sizes) / 5
+                                               for bucket_sizes in sizes])
+
+    top = index.top_k(3)
+    assert [value for _, value in top] == sorted(index.information(), reverse=True)[:3]
+    assert top[0][0] == repeated_letter_vocab[int(np.argmax(index.information()))]
+    fewest = index.top_k(2, by='worst_case')
+    assert [value for _, value in fewest] == sorted(index.worst_case().tolist())[:2]
+    assert index.top_k(1, by='expected_size')[0][1] == index.expected_size().min()
+    with pytest.raises(ValueError):
+        index.top_k(1, by='vowels')
+
+def test_subset_of_guesses(repeated_letter_vocab):
+    pattern_matrix = PatternMatrix(repeated_letter_vocab, repeated_letter_vocab)
+    full = BucketIndex.from_pattern_matrix(pattern_matrix)
+    some = BucketIndex.from_pattern_matrix(pattern_matrix, guess_ids=[7, 1])
+    assert some.guesses == ['label', 'spark']
+    assert np.array_equal(some.counts, full.counts[[7, 1]])
+    assert np.array_equal(BucketIndex.from_codes(repeated_letter_vocab, pattern_matrix.matrix).counts,
+                          full.counts)
+
+def test_bucket_histograms(repeated_letter_vocab, monkeypatch):
+    """Blocks of histograms count the codes of every row, for all or some guesses"""
+    monkeypatch.setattr(information, '_BLOCK_CELLS', 6)
+    matrix = PatternMatrix(repeated_letter_vocab, repeated_letter_vocab).matrix
+    candidate_ids, guess_ids = np.array([0, 2, 3]), np.array([4, 1])
+    expected = [np.bincount(row, minlength=243) for row in matrix[:, candidate_ids]]
+    blocks = list(information.bucket_histograms(matrix, candidate_ids, num_patterns=243))
+    # Two rows of three candidates per block
+    assert [start for start, _, _ in blocks] == list(range(0, len(matrix), 2))
+    for start, bins, histogram in blocks:
+        assert np.array_equal(histogram, expected[start:start + len(histogram)])
+        codes = matrix[start:start + len(histogram), candidate_ids]
+        assert np.array_equal(bins.reshape(codes.shape) % 243, codes)
+        assert np.array_equal(bins.reshape(codes.shape) // 243, np.indices(codes.shape)[0])
+    (_, _, histogram), = information.bucket_histograms(matrix[:, :2], np.arange(2), guess_ids)
+    assert histogram.shape[1] == matrix[guess_ids, :2].max() + 1
+    assert np.array_equal(histogram.sum(axis=1), [2, 2])
@@ -0,0 +1,114 @@
+import os
+import threading
+import time
+import numpy as np
+import pytest
+import solver.cache_manager as cache_manager
+from solver.cache_manager import CacheManager
+
+
+def test_get_builds_once(tmp_path, chimp_vocab):
+    manager = CacheManager(tmp_path)
+    pattern_matrix, information = manager.get(chimp_vocab, chimp_vocab[1:])
+    assert pattern_matrix.answers == chimp_vocab[1:]
+    assert isinstance(pattern_matrix.matrix, np.memmap)
+    assert [entry['path'] for entry in manager.entries()] == [manager.path_for(chimp_vocab, chimp_vocab[1:])]
+    assert manager.entries()[0]['num_guesses'] == len(chimp_vocab)
+    assert manager.verify(manager.path_for(chimp_vocab, chimp_vocab[1:]), deep=True) == []
+
+def test_concurrent_builds_wait_for_the_first(tmp_path, chimp_vocab, monkeypatch):
+    builds = []
+    build = cache_manager.PatternMatrix
+    def slow_build(guesses, answers):
+        builds.append(guesses)
+        time.sleep(0.05)
+        return build(guesses, answers)
+    monkeypatch.setattr(cache_manager, 'PatternMatrix', slow_build)
+    manager = CacheManager(tmp_path)
+    threads = [threading.Thread(target=manager.get, args=(chimp_vocab, chimp_vocab)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(builds) == 1
+    # The lock file stays, so later processes lock the same file
+    name = os.path.basename(manager.path_for(chimp_vocab, chimp_vocab))
+    assert sorted(os.listdir(tmp_path)) == [name, f'{name}.lock']
+
+def test_verify_finds_damage(tmp_path, chimp_vocab):
+    manager = CacheManager(tmp_path)
+    manager.get(chimp_vocab, chimp_vocab)
+    path = manager.path_for(chimp_vocab, chimp_vocab)
+    renamed = manager.path_for(chimp_vocab, chimp_vocab[1:])
+    os.rename(path, renamed)
+    assert manager.verify(renamed) == ['file name does not match the word lists (or versions) it holds']
+    with open(renamed, 'r+b') as handle:
+        handle.truncate(os.path.getsize(renamed) - 1)
+    assert 'file is truncated' in manager.verify(renamed)
+    with open(renamed, 'wb') as handle:
+        handle.write(b'junk')
+    assert manager.verify(renamed) and 'error' in manager.entries()[0]
+
+def test_evict(tmp_path, chimp_vocab):
+    manager = CacheManager(tmp_path)
+    paths = []
+    for num_answers in (3, 4, 5):
+        manager.get(chimp_vocab, chimp_vocab[:num_answers])
+        paths.append(manager.path_for(chimp_vocab, chimp_vocab[:num_answers]))
+        os.utime(paths[-1], (num_answers, num_answers))
+    # Loading a cache marks it as used
+    manager.get(chimp_vocab, chimp_vocab[:3])
+    sizes = {entry['path']: entry['size'] for entry in manager.entries()}
+    assert manager.evict(max_bytes=sizes[paths[0]] + sizes[paths[2]]) == [paths[1]]
+    assert manager.evict(older_than=60) == [paths[2]]
+    with open(paths[0], 'wb') as handle:
+        handle.write(b'junk')
+    assert manager.evict(invalid=True) == [paths[0]]
+    manager.get(chimp_vocab, chimp_vocab)
+    assert len(manager.evict(everything=True)) == 1
+    assert manager.entries() == []
+    assert all(name.endswith('.lock') for name in os.listdir(tmp_path))
+
+def test_update_pattern_cache(tmp_path, chimp_vocab):
+    """Edited word lists get exactly the cache a fresh build would give"""
+    manager = CacheManager(tmp_path)
+    source_path = manager.path_for(chimp_vocab, chimp_vocab)
+    manager.get(chimp_vocab, chimp_vocab)
+    guesses = ['PITCH', 'MATCH', 'CHIMP', 'CATCH', 'WATCH']
+    answers = ['WATCH', 'CATCH', 'MATCH', 'CHIMP']
+    path = tmp_path / 'updated.bin'
+    stats = cache_manager.update_pattern_cache(source_path, path, guesses, answers)
+    assert stats == {'copied_cells': 3 * 3, 'computed_cells': 5 * 4 - 3 * 3, 'scored_guesses': 5}
+    fresh = tmp_path / 'fresh.bin'
+    cache_manager.ensure_pattern_cache(fresh, guesses, answers)
+    updated, updated_information = cache_manager.pattern_cache.load_pattern_cache(path, guesses, answers)
+    expected, expected_information = cache_manager.pattern_cache.load_pattern_cache(fresh)
+    assert np.array_equal(updated.matrix, expected.matrix)
+    assert np.array_equal(updated_information, expected_information)
+
+    # With the same answers, only new guesses are scored
+    stats = cache_manager.update_pattern_cache(source_path, tmp_path / 'guesses.bin',
+                                               ['PITCH'] + chimp_vocab, chimp_vocab[::-1])
+    assert stats['scored_guesses'] == 1
+    _, information = cache_manager.pattern_cache.load_pattern_cache(tmp_path / 'guesses.bin')
+    assert np.array_equal(information, manager.get(['PITCH'] + chimp_vocab, chimp_vocab[::-1])[1])
+
+    with pytest.raises(ValueError):
+        cache_manager.update_pattern_cache(source_path, tmp_path / 'short.bin', ['CHIP'], ['CHIP'])
+
+def test_manager_update(tmp_path, chimp_vocab):
+    manager = CacheManager(tmp_path)
+    manager.get(chimp_vocab, chimp_vocab)
+    manager.get(['ABOUT', 'ABOVE'], ['ABOUT'])
+    guesses = chimp_vocab + ['WATCH']
+    assert manager.closest(guesses, chimp_vocab) == manager.path_for(chimp_vocab, chimp_vocab)
+    path, stats = manager.update(guesses, chimp_vocab)
+    assert path == manager.path_for(guesses, chimp_vocab)
+    assert stats['copied_cells'] == 25 and stats['scored_guesses'] == 1
+    assert manager.verify(path, deep=True) == []
+    assert manager.update(guesses, chimp_vocab) == (path, None)
+    assert len(manager.paths()) == 3
+    assert os.path.exists(f'{path}.lock')
+    # Nothing to start from: built from scratch
+    _, stats = manager.update(['QUIZZ'], ['QUIZZ'])
+    assert stats == {'copied_cells': 0, 'computed_cells': 1, 'scored_guesses': 1}
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from solver.candidate_set import BucketMasks, full_mask, ids_to_mask, mask_to_ids
+from solver.game_state import GameState
+from solver.pattern_matrix import PatternMatrix
+
+
+@pytest.fixture
+def pattern_matrix():
+    words = ['chimp', 'catch', 'patch', 'match', 'hatch', 'latch', 'chump']
+    return PatternMatrix(words, words)
+
+def test_mask_round_trip():
+    ids = np.array([0, 3, 64, 200], dtype=np.int32)
+    mask = ids_to_mask(ids, 201)
+    assert mask == (1 << 0) | (1 << 3) | (1 << 64) | (1 << 200)
+    assert ids_to_mask(ids[::-1], 300) == mask
+    assert np.array_equal(mask_to_ids(mask, 201), ids)
+    assert np.array_equal(mask_to_ids(full_mask(10), 10), np.arange(10))
+    assert len(mask_to_ids(0, 10)) == 0
+
+def test_narrowing_is_an_and(pattern_matrix):
+    bucket_masks = BucketMasks(pattern_matrix)
+    state = GameState(np.arange(len(pattern_matrix.answers)))
+    for guess_id in range(len(pattern_matrix.guesses)):
+        for code in np.unique(pattern_matrix.matrix[guess_id]):
+            narrowed = state.narrow(pattern_matrix, guess_id, int(code))
+            mask = state.mask & bucket_masks.mask(guess_id, int(code))
+            assert narrowed.key == mask
+            assert np.array_equal(GameState.from_mask(mask, len(pattern_matrix.answers)).candidate_ids,
+                                  narrowed.candidate_ids)
+    assert bucket_masks.mask(0, 1) == 0
+
+def test_keys_ignore_history():
+    first = GameState([2, 3, 4], history=[(0, 5)])
+    second = GameState(np.array([2, 3, 4]), history=[(1, 7), (6, 2)])
+    assert first.key == second.key
+    assert first.key != GameState([2, 3]).key
+
+def test_bucket_masks_are_bounded(pattern_matrix):
+    bucket_masks = BucketMasks(pattern_matrix, max_guesses=2)
+    for guess_id in range(len(pattern_matrix.guesses)):
+        bucket_masks.guess_masks(guess_id)
+    assert list(bucket_masks._masks) == [5, 6]
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from solver.assess_solver import AssessSolver
+from solver.candidate_set import mask_to_ids
+from solver.hard_mode import HardModeIndex
+from solver.pattern_matrix import compute_pattern_matrix
+from solver.puzzle import Puzzle
+from solver.solver import InformationTheorySolver
+
+
+def test_constraints_match_patterns(small_vocab):
+    """The legal guesses after a feedback are exactly the words giving that feedback"""
+    guesses, _ = small_vocab
+    index = HardModeIndex(guesses)
+    patterns = compute_pattern_matrix(guesses, guesses)
+    for guess_id in range(0, len(guesses), 7):
+        for code in np.unique(patterns[guess_id]).tolist():
+            legal = mask_to_ids(index.constraint_mask(guess_id, code), len(guesses))
+            assert np.array_equal(legal, np.flatnonzero(patterns[guess_id] == code))
+
+def test_legal_after_history():
+    index = HardModeIndex(['speed', 'spend', 'erase', 'abide', 'crepe'])
+    # 'speed' against 'spend': s, p, e green, e black, d green
+    history = [(0, int(compute_pattern_matrix(['speed'], ['spend'])[0, 0]))]
+    assert index.legal_ids(history).tolist() == [1]
+    assert index.is_legal(1, history) and not index.is_legal(0, history)
+    assert index.legal_ids([]).tolist() == [0, 1, 2, 3, 4]
+
+def test_hard_mode_assessment(small_vocab):
+    guesses, answers = small_vocab
+    hard = InformationTheorySolver(guesses, answers, hard_mode=True)
+    # Every game is checked against the hard-mode rules
+    hard_games = AssessSolver(answers).assess(hard)
+    assert all(games[-1] == word for word, games in hard_games.items())
+    normal = InformationTheorySolver(guesses, answers)
+    normal_games = AssessSolver(answers).assess(normal)
+    assert normal_games != hard_games
+    with pytest.raises(ValueError):
+        AssessSolver(answers).assess(normal, hard_mode=True)
+
+def test_hard_mode_rejects_strategy_tree(small_vocab):
+    guesses, answers = small_vocab
+    with pytest.raises(ValueError):
+        InformationTheorySolver(guesses, answers, strategy_tree=object(), hard_mode=True)
+
+def test_hard_mode_solve_many(small_vocab):
+    guesses, answers = small_vocab
+    hard = InformationTheorySolver(guesses, answers, hard_mode=True)
+    lockstep = hard.solve_many([Puzzle(word) for word in answers])
+    fresh = InformationTheorySolver(guesses, answers, hard_mode=True)
+    assert lockstep == [fresh.solve(Puzzle(word)) for word in answers]
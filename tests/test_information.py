@@ -1,5 +1,7 @@
+import numpy as np
 import pytest
 import solver.information as information
+from solver.pattern_matrix import compute_pattern_matrix
 from solver.wordle_color import WordleColor
 
 
@@ -124,3 +126,47 @@ def test_compute_information_subset(clear_winner_vocab):
     info = information.compute_information_from_frequencies(pattern_frequencies, clear_winner_vocab)
     print(info)
     assert info == expected
+
+
+def test_compute_information_matches_frequencies(clear_winner_vocab):
+    """The pattern matrix engine should agree with the dictionary-based one"""
+    pattern_frequencies = information.compute_pattern_frequencies(clear_winner_vocab, clear_winner_vocab)
+    expected = information.compute_information_from_frequencies(pattern_frequencies, clear_winner_vocab)
+    pattern_matrix = compute_pattern_matrix(clear_winner_vocab, clear_winner_vocab)
+    info = information.compute_information(pattern_matrix, np.arange(len(clear_winner_vocab)))
+    assert info == pytest.approx([expected[word] for word in clear_winner_vocab])
+
+
+def test_compute_information_candidate_subset(clear_winner_vocab):
+    pattern_matrix = compute_pattern_matrix(clear_winner_vocab, clear_winner_vocab)
+    info = information.compute_information(pattern_matrix, np.array([1, 2]))
+    assert info == pytest.approx([1.0, 1.0, 1.0, 0.0, 0.0])
+
+
+def test_compute_information_exact_ties(clear_winner_vocab):
+    """Guesses splitting the candidates into equally sized buckets must tie exactly"""
+    pattern_matrix = compute_pattern_matrix(clear_winner_vocab, clear_winner_vocab)
+    info = information.compute_information(pattern_matrix, np.arange(len(clear_winner_vocab)),
+                                           guess_ids=np.array([1, 2, 3, 4]))
+    assert len(set(info.tolist())) == 1
+
+
+def test_distinct_partitions():
+    """Keeps the first row of every distinct informative partition"""
+    codes = np.array([
+        [0, 0, 0],  # one bucket
+        [1, 2, 1],
+        [5, 7, 5],  # same buckets as row 1
+        [0, 1, 2],
+        [3, 3, 3],  # one bucket
+        [2, 1, 0],  # same buckets as row 3
+        [4, 4, 0],
+    ], dtype=np.uint8)
+    assert information.distinct_partitions(codes).tolist() == [1, 3, 6]
+
+
+def test_distinct_partitions_many_candidates():
+    """Larger states are not pruned, so they are rejected"""
+    codes = np.zeros((3, 12), dtype=np.uint8)
+    with pytest.raises(ValueError):
+        information.distinct_partitions(codes)
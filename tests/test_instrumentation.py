@@ -0,0 +1,46 @@
+import csv
+import json
+import pytest
+from solver.assess_solver import AssessSolver
+from solver.instrumentation import TURN_FIELDS, SolveStats
+from solver.puzzle import Puzzle
+from solver.solver import InformationTheorySolver
+
+
+def test_solve_reports_every_turn(chimp_vocab):
+    turns = []
+    guesses = InformationTheorySolver(chimp_vocab, chimp_vocab).solve(Puzzle('PATCH'), on_turn=turns.append)
+    assert [turn['guess'] for turn in turns] == guesses == ['CHIMP', 'PATCH']
+    assert all(set(turn) == set(TURN_FIELDS) for turn in turns)
+    assert [turn['turn'] for turn in turns] == [1, 2]
+    assert [(turn['candidates_before'], turn['candidates_after']) for turn in turns] == [(5, 1), (1, 1)]
+    assert [turn['guess_source'] for turn in turns] == ['computed', 'last']
+
+def test_assess_summaries(tmp_path, chimp_vocab):
+    stats = SolveStats()
+    AssessSolver(chimp_vocab).assess(InformationTheorySolver(chimp_vocab, chimp_vocab),
+                                     instrumentation=stats)
+    assert len(stats) == 9
+    assert [turn['word'] for turn in stats.turns[:3]] == ['CHIMP', 'CATCH', 'CATCH']
+    assert stats.per_word()['CATCH']['turns'] == 2
+    depths = stats.per_depth()
+    assert depths[1]['games'] == 5 and depths[1]['mean_candidates_before'] == 5
+    assert depths[2]['games'] == 4 and depths[2]['last'] == 4
+
+    stats.dump_json(tmp_path / 'stats.json')
+    with open(tmp_path / 'stats.json') as handle:
+        assert len(json.load(handle)['turns']) == 9
+    stats.dump_csv(tmp_path / 'words.csv', table='words')
+    with open(tmp_path / 'words.csv', newline='') as handle:
+        assert [row['word'] for row in csv.DictReader(handle)] == chimp_vocab
+    with pytest.raises(ValueError):
+        stats.dump_csv(tmp_path / 'other.csv', table='other')
+
+def test_parallel_assess_instrumentation(chimp_vocab):
+    info_theory_solver = InformationTheorySolver(chimp_vocab, chimp_vocab)
+    serial, parallel = SolveStats(), SolveStats()
+    AssessSolver(chimp_vocab).assess(info_theory_solver, instrumentation=serial)
+    AssessSolver(chimp_vocab).assess(info_theory_solver, processes=2, instrumentation=parallel)
+    def key(turn):
+        return turn['word'], turn['turn'], turn['guess'], turn['candidates_after']
+    assert [key(turn) for turn in parallel.turns] == [key(turn) for turn in serial.turns]
@@ -0,0 +1,92 @@
+from functools import lru_cache
+import pytest
+from solver.assess_solver import AssessSolver
+from solver.lookahead_solver import LookaheadSolver
+from solver.puzzle import Puzzle
+from solver.solver import InformationTheorySolver
+
+
+# Few enough words for brute_force_cost
+pytestmark = pytest.mark.parametrize('small_vocab', [(80, 700)], indirect=True)
+
+
+def brute_force_cost(guesses, answers):
+    """Fewest total guesses to solve every answer, trying every guess everywhere"""
+    @lru_cache(maxsize=None)
+    def cost(candidates):
+        if len(candidates) == 1:
+            return 1
+        best = None
+        for guess in guesses:
+            buckets = {}
+            for answer in candidates:
+                key = tuple(Puzzle.assess_guess(guess, answer))
+                if answer != guess:
+                    buckets.setdefault(key, []).append(answer)
+            if len(buckets) == 1 and len(next(iter(buckets.values()))) == len(candidates):
+                continue
+            total = len(candidates) + sum(cost(tuple(bucket)) for bucket in buckets.values())
+            best = total if best is None else min(best, total)
+        return best
+    return cost(tuple(answers))
+
+def test_exact_search_is_optimal(small_vocab):
+    guesses, answers = small_vocab
+    lookahead_solver = LookaheadSolver(guesses, answers, breadth=None)
+    assert lookahead_solver.search(lookahead_solver.initial_state().candidate_ids)[0] == \
+        brute_force_cost(guesses, answers)
+
+def test_assess_matches_search(small_vocab):
+    guesses, answers = small_vocab
+    lookahead_solver = LookaheadSolver(guesses, answers, breadth=2)
+    solved = AssessSolver(answers).assess(lookahead_solver)
+    average = sum(len(game) for game in solved.values()) / len(answers)
+    assert average == pytest.approx(lookahead_solver.expected_guesses())
+
+def test_lookahead_beats_greedy(small_vocab):
+    guesses, answers = small_vocab
+    greedy = AssessSolver(answers).assess(InformationTheorySolver(guesses, answers))
+    lookahead = AssessSolver(answers).assess(LookaheadSolver(guesses, answers, breadth=3))
+    assert sum(map(len, lookahead.values())) <= sum(map(len, greedy.values()))
+
+def test_depth_zero_is_greedy(small_vocab):
+    guesses, answers = small_vocab
+    greedy = AssessSolver(answers).assess(InformationTheorySolver(guesses, answers))
+    assert AssessSolver(answers).assess(LookaheadSolver(guesses, answers, max_depth=0)) == greedy
+
+def test_no_search_below_depth_zero(small_vocab):
+    """Buckets of states at depth 0 stay at depth 0, where guesses are greedy"""
+    guesses, answers = small_vocab
+    for max_depth in (0, 1):
+        lookahead_solver = LookaheadSolver(guesses, answers, breadth=2, max_depth=max_depth)
+        depths = []
+        search = lookahead_solver._search
+        def recording_search(candidate_ids, depth, budget):
+            depths.append(depth)
+            return search(candidate_ids, depth, budget)
+        lookahead_solver._search = recording_search
+        for word in answers:
+            lookahead_solver.solve(Puzzle(word))
+        assert depths and min(depths) == 0
+
+def test_strategy_tree_rejected(small_vocab):
+    with pytest.raises(ValueError):
+        LookaheadSolver(*small_vocab, strategy_tree=object())
+
+def test_invalid_breadth(small_vocab):
+    with pytest.raises(ValueError):
+        LookaheadSolver(*small_vocab, breadth=0)
+
+def test_opener(small_vocab):
+    guesses, answers = small_vocab
+    lookahead_solver = LookaheadSolver(guesses, answers, opener=guesses[-1])
+    assert lookahead_solver.solve(Puzzle(answers[0]))[0] == guesses[-1]
+    with pytest.raises(ValueError):
+        LookaheadSolver(guesses, answers, opener='zzzzz')
+
+def test_solve_many_matches_solve(small_vocab):
+    guesses, answers = small_vocab
+    lookahead_solver = LookaheadSolver(guesses, answers, breadth=2)
+    lockstep = lookahead_solver.solve_many([Puzzle(word) for word in answers])
+    fresh = LookaheadSolver(guesses, answers, breadth=2)
+    assert lockstep == [fresh.solve(Puzzle(word)) for word in answers]
@@ -0,0 +1,90 @@
+import csv
+import os
+import pytest
+from solver.opener_ranking import GameTreeEvaluator, rank_openers, write_ranking, RANKING_FIELDS
+from solver.puzzle import Puzzle
+from solver.solver import InformationTheorySolver
+
+
+@pytest.fixture
+def small_solver(small_vocab):
+    guesses, answers = small_vocab
+    return InformationTheorySolver(guesses, answers)
+
+def test_evaluator_matches_games(small_solver):
+    """The totals of the solver's own opener are those of playing every game"""
+    guess_counts = [len(small_solver.solve(Puzzle(word, small_solver.vocab)))
+                    for word in small_solver.possible_solutions]
+    opener = small_solver.next_guess(small_solver.initial_state())
+    total, worst = GameTreeEvaluator(small_solver).evaluate_opener(opener)
+    assert total == sum(guess_counts)
+    assert worst == max(guess_counts)
+
+class ForcedOpenerSolver(InformationTheorySolver):
+    """Opens every game with a given word, then plays as usual"""
+    def __init__(self, opener, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.opener = opener
+
+    def _choose_guess(self, state):
+        if not state.history:
+            return self.pattern_matrix.guess_index[self.opener], 'computed'
+        return super()._choose_guess(state)
+
+def test_forced_opener(small_vocab, small_solver):
+    """Forced openers total the guesses of playing every game after them"""
+    guesses, answers = small_vocab
+    evaluator = GameTreeEvaluator(small_solver)
+    for opener in (answers[3], guesses[-1]):
+        forced = ForcedOpenerSolver(opener, guesses, answers)
+        guess_counts = [len(forced.solve(Puzzle(word, guesses))) for word in answers]
+        total, worst = evaluator.evaluate_opener(small_solver.pattern_matrix.guess_index[opener])
+        assert total == sum(guess_counts)
+        assert worst == max(guess_counts)
+
+def test_hard_mode_rejected(small_vocab):
+    guesses, answers = small_vocab
+    with pytest.raises(ValueError):
+        GameTreeEvaluator(InformationTheorySolver(guesses, answers, hard_mode=True))
+
+def test_rank_and_resume(small_solver, tmp_path):
+    openers = small_solver.vocab[:7]
+    ranking = rank_openers(small_solver, tmp_path, openers, shard_size=3)
+    assert sorted(row['opener'] for row in ranking) == sorted(openers)
+    assert [row['rank'] for row in ranking] == list(range(1, 8))
+    assert [row['total_guesses'] for row in ranking] == sorted(row['total_guesses'] for row in ranking)
+    shards = sorted(name for name in os.listdir(tmp_path) if name.startswith('shard_'))
+    assert shards == ['shard_00000.json', 'shard_00001.json', 'shard_00002.json']
+
+    # Finished shards are reused as they are: tamper with one to tell
+    with open(tmp_path / shards[0]) as handle:
+        saved = handle.read()
+    with open(tmp_path / shards[0], 'w') as handle:
+        handle.write(saved.replace('"worst": ', '"worst": 10'))
+    os.remove(tmp_path / shards[1])
+    resumed = rank_openers(small_solver, tmp_path, openers, shard_size=3)
+    worsts = {row['opener']: row['worst'] for row in resumed}
+    assert all(worsts[opener] >= 100 for opener in openers[:3])
+    assert {row['opener']: row['total_guesses'] for row in resumed} == \
+        {row['opener']: row['total_guesses'] for row in ranking}
+
+def test_parallel_matches_serial(small_solver, tmp_path):
+    openers = small_solver.vocab[:6]
+    serial = rank_openers(small_solver, tmp_path / 'serial', openers, shard_size=2)
+    parallel = rank_openers(small_solver, tmp_path / 'parallel', openers, processes=2, shard_size=2)
+    assert parallel == serial
+
+def test_checkpoint_mismatch(small_solver, tmp_path):
+    rank_openers(small_solver, tmp_path, small_solver.vocab[:2], shard_size=2)
+    with pytest.raises(ValueError):
+        rank_openers(small_solver, tmp_path, small_solver.vocab[2:4], shard_size=2)
+    with pytest.raises(ValueError):
+        rank_openers(small_solver, tmp_path, small_solver.vocab[:2], shard_size=1)
+
+def test_write_ranking(small_solver, tmp_path):
+    ranking = rank_openers(small_solver, tmp_path / 'checkpoints', small_solver.vocab[:3])
+    write_ranking(tmp_path / 'openers.csv', ranking)
+    with open(tmp_path / 'openers.csv', newline='') as handle:
+        rows = list(csv.DictReader(handle))
+    assert tuple(rows[0]) == RANKING_FIELDS
+    assert [row['opener'] for row in rows] == [row['opener'] for row in ranking]
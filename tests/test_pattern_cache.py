@@ -0,0 +1,75 @@
+import os
+import numpy as np
+import pytest
+import solver.pattern_cache as pattern_cache
+from solver.pattern_matrix import PatternMatrix
+from solver.puzzle import Puzzle
+from solver.solver import InformationTheorySolver
+
+
+def test_pattern_cache_round_trip(tmp_path, chimp_vocab):
+    path = tmp_path / 'patterns.bin'
+    pattern_matrix = PatternMatrix(chimp_vocab, chimp_vocab[1:])
+    information = np.arange(len(chimp_vocab), dtype=float)
+    pattern_cache.save_pattern_cache(path, pattern_matrix, information)
+
+    loaded, loaded_information = pattern_cache.load_pattern_cache(path, chimp_vocab, chimp_vocab[1:])
+    assert isinstance(loaded.matrix, np.memmap)
+    assert loaded.guesses == chimp_vocab
+    assert loaded.answers == chimp_vocab[1:]
+    assert np.array_equal(loaded.matrix, pattern_matrix.matrix)
+    assert np.array_equal(loaded_information, information)
+
+def test_pattern_cache_without_information(tmp_path, chimp_vocab):
+    path = tmp_path / 'patterns.bin'
+    pattern_cache.save_pattern_cache(path, PatternMatrix(chimp_vocab, chimp_vocab))
+    _, information = pattern_cache.load_pattern_cache(path)
+    assert information is None
+
+def test_pattern_cache_stale_word_list(tmp_path, chimp_vocab):
+    path = tmp_path / 'patterns.bin'
+    pattern_cache.save_pattern_cache(path, PatternMatrix(chimp_vocab, chimp_vocab))
+    with pytest.raises(ValueError):
+        pattern_cache.load_pattern_cache(path, guesses=chimp_vocab[::-1])
+
+def test_pattern_cache_not_a_cache(tmp_path):
+    path = tmp_path / 'patterns.bin'
+    path.write_bytes(b'\x80' * 512)
+    with pytest.raises(ValueError):
+        pattern_cache.read_cache_header(path)
+
+def test_solver_builds_and_reuses_cache(tmp_path, chimp_vocab):
+    path = tmp_path / 'patterns.bin'
+    built = InformationTheorySolver(chimp_vocab, chimp_vocab, cache_path=path)
+    assert path.exists()
+    loaded = InformationTheorySolver(chimp_vocab, chimp_vocab, cache_path=path)
+    assert np.array_equal(built.information, loaded.information)
+    assert loaded.solve(Puzzle('MATCH')) == ['CHIMP', 'MATCH']
+
+def test_solver_cache_with_more_answers(tmp_path, chimp_vocab):
+    """Stored information is over every answer, so a solver over fewer answers recomputes it"""
+    path = tmp_path / 'patterns.bin'
+    InformationTheorySolver(chimp_vocab, chimp_vocab, cache_path=path)
+    loaded = InformationTheorySolver(chimp_vocab, chimp_vocab[:3], cache_path=path)
+    expected = InformationTheorySolver(chimp_vocab, chimp_vocab[:3]).information
+    assert np.array_equal(loaded.information, expected)
+
+def test_cache_path_for_is_content_addressed(tmp_path, chimp_vocab):
+    path = pattern_cache.cache_path_for(chimp_vocab, chimp_vocab, tmp_path)
+    assert path == pattern_cache.cache_path_for(list(chimp_vocab), list(chimp_vocab), tmp_path)
+    assert path != pattern_cache.cache_path_for(chimp_vocab, chimp_vocab[1:], tmp_path)
+    assert path != pattern_cache.cache_path_for(['CHIMPS', 'CATCHY'], ['CHIMPS'], tmp_path)
+    assert 'patterns_5_' in path and 'patterns_6_' in \
+        pattern_cache.cache_path_for(['CHIMPS', 'CATCHY'], ['CHIMPS'], tmp_path)
+
+def test_solver_uses_cache_dir(tmp_path, chimp_vocab):
+    cache_dir = tmp_path / 'caches'
+    five = InformationTheorySolver(chimp_vocab, chimp_vocab, cache_dir=cache_dir)
+    four = InformationTheorySolver(['CHIP', 'CHAT', 'PATH', 'MATH'], ['CHAT', 'PATH', 'MATH'],
+                                   cache_dir=cache_dir)
+    assert sorted(path.name for path in cache_dir.glob('*.bin')) == sorted(
+        os.path.basename(path) for path in [
+            pattern_cache.cache_path_for(chimp_vocab, chimp_vocab),
+            pattern_cache.cache_path_for(['CHIP', 'CHAT', 'PATH', 'MATH'], ['CHAT', 'PATH', 'MATH'])])
+    assert isinstance(five.pattern_matrix.matrix, np.memmap)
+    assert four.solve(Puzzle('MATH'))[-1] == 'MATH'
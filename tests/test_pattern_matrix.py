@@ -0,0 +1,93 @@
+import pickle
+import numpy as np
+import pytest
+import solver.information as information
+from solver.pattern_matrix import LazyPatternTable, PatternMatrix, assessment_to_code, \
+    code_to_assessment, compute_pattern_matrix, pattern_dtype
+from solver.puzzle import Puzzle
+from solver.wordle_color import WordleColor
+
+
+def test_code_round_trip():
+    assessment = [WordleColor.GREEN, WordleColor.BLACK, WordleColor.YELLOW, WordleColor.BLACK, WordleColor.GREEN]
+    code = assessment_to_code(assessment)
+    assert code == 2 + 9 + 2 * 81
+    assert code_to_assessment(code, 5) == assessment
+
+def test_pattern_matrix_matches_assess_guess(repeated_letter_vocab):
+    """Every entry must match Puzzle.assess_guess, including repeated letters"""
+    matrix = compute_pattern_matrix(repeated_letter_vocab, repeated_letter_vocab)
+    assert matrix.dtype == np.uint8
+    for i, guess in enumerate(repeated_letter_vocab):
+        for j, hidden in enumerate(repeated_letter_vocab):
+            assert matrix[i, j] == assessment_to_code(Puzzle.assess_guess(guess, hidden))
+
+@pytest.mark.parametrize('word_length', [2, 5, 6, 10, 11, 12])
+def test_pattern_matrix_long_words(word_length):
+    """Codes of long words need wider dtypes, and must still match Puzzle.assess_guess"""
+    rng = np.random.default_rng(word_length)
+    words = [''.join(rng.choice(list('abcde'), word_length)) for _ in range(30)]
+    matrix = compute_pattern_matrix(words, words)
+    assert matrix.dtype == pattern_dtype(word_length)
+    for i, guess in enumerate(words):
+        for j, hidden in enumerate(words):
+            assert matrix[i, j] == assessment_to_code(Puzzle.assess_guess(guess, hidden))
+
+def test_pattern_dtype():
+    assert [pattern_dtype(word_length) for word_length in (5, 10, 11, 20)] == \
+        [np.uint8, np.uint16, np.uint32, np.uint32]
+    with pytest.raises(ValueError):
+        pattern_dtype(21)
+
+def test_pattern_matrix_bucket(repeated_letter_vocab):
+    pattern_matrix = PatternMatrix(repeated_letter_vocab, repeated_letter_vocab)
+    assessment = Puzzle.assess_guess('label', 'llama')
+    assert pattern_matrix.bucket('label', assessment) == ['llama']
+    assert pattern_matrix.code('panda', 'panda') == pattern_matrix.all_green_code
+
+def test_pattern_matrix_from_pattern_frequencies(repeated_letter_vocab):
+    pattern_frequencies = information.compute_pattern_frequencies(
+        repeated_letter_vocab, repeated_letter_vocab)
+    converted = PatternMatrix.from_pattern_frequencies(pattern_frequencies)
+    expected = PatternMatrix(repeated_letter_vocab, sorted(repeated_letter_vocab))
+    assert converted.answers == expected.answers
+    assert np.array_equal(converted.matrix, expected.matrix)
+
+def test_pattern_matrix_mismatched_lengths():
+    with pytest.raises(ValueError):
+        compute_pattern_matrix(['abcd'], ['abcde'])
+
+@pytest.mark.parametrize('memory_budget', [None, 20, 1])
+def test_lazy_pattern_table(repeated_letter_vocab, memory_budget):
+    """Lazy tables index like the dense matrix, whatever their budget"""
+    answers = repeated_letter_vocab[::2]
+    dense = compute_pattern_matrix(repeated_letter_vocab, answers)
+    table = LazyPatternTable(repeated_letter_vocab, answers, memory_budget)
+    assert table.shape == dense.shape and len(table) == len(dense)
+    assert table.cached_bytes == 0
+    rows, columns = np.array([7, 1, 4]), np.array([3, 0])
+    for key in [(2, 3), -1, (5, columns), slice(2, 7), (slice(1, 8), columns), rows,
+                np.ix_(rows, columns), (slice(None), 3), (rows, -1), slice(None)]:
+        assert np.array_equal(table[key], dense[key])
+        # The budget bounds blocks and columns together
+        assert memory_budget is None or table.cached_bytes <= memory_budget
+    assert np.array_equal(np.take(table, columns, axis=1), np.take(dense, columns, axis=1))
+    assert np.array_equal(np.asarray(table), dense)
+    with pytest.raises(IndexError):
+        table[len(repeated_letter_vocab)]
+    with pytest.raises(IndexError):
+        table[:, len(answers)]
+    copy = pickle.loads(pickle.dumps(table))
+    assert copy.cached_bytes == 0
+    assert np.array_equal(copy[:], dense)
+
+def test_lazy_pattern_matrix(repeated_letter_vocab):
+    lazy = PatternMatrix.lazy(repeated_letter_vocab, repeated_letter_vocab, memory_budget=30)
+    expected = PatternMatrix(repeated_letter_vocab, repeated_letter_vocab)
+    assert lazy.code('label', 'llama') == expected.code('label', 'llama')
+    assert lazy.bucket('label', Puzzle.assess_guess('label', 'llama')) == ['llama']
+    assert np.array_equal(information.compute_information(lazy.matrix, np.arange(5)),
+                          information.compute_information(expected.matrix, np.arange(5)))
+    copy = pickle.loads(pickle.dumps(lazy))
+    assert isinstance(copy.matrix, LazyPatternTable)
+    assert np.array_equal(copy.matrix[:], expected.matrix)
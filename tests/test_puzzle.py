@@ -1,3 +1,6 @@
+import pytest
+from solver.assessment_cache import AssessmentCache
+from solver.pattern_matrix import PatternMatrix, assessment_to_code
 from solver.puzzle import Puzzle
 from solver.wordle_color import WordleColor
 
@@ -43,3 +46,44 @@ def test_assess_green_priority():
         WordleColor.BLACK, WordleColor.BLACK, WordleColor.BLACK, WordleColor.BLACK, WordleColor.GREEN
     ]
     assert puzzle.assess(candidate_word) == expected
+
+def test_assessment_cache_bounded():
+    """The cache evicts least recently used entries and stores integer codes"""
+    cache = AssessmentCache(max_size=2)
+    cache.put('wings', 'waist', 1)
+    cache.put('panda', 'spark', 2)
+    assert cache.get('wings', 'waist') == 1
+    cache.put('panda', 'sigma', 3)
+    assert len(cache) == 2
+    assert cache.get('panda', 'spark') is None
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+def test_assessment_cache_matrix_fallback():
+    words = ['panda', 'spark', 'sigma']
+    cache = AssessmentCache(pattern_matrix=PatternMatrix(words, words))
+    assert cache.get('panda', 'sigma') == assessment_to_code(
+        [WordleColor.BLACK, WordleColor.BLACK, WordleColor.BLACK, WordleColor.BLACK, WordleColor.GREEN])
+    assert cache.get('panda', 'waist') is None
+    assert cache.stats()['matrix_hits'] == 1
+
+def test_assess_guess_uses_cache():
+    original = Puzzle.assessments
+    Puzzle.assessments = AssessmentCache(max_size=4)
+    try:
+        first = Puzzle.assess_guess('spark', 'panda')
+        assert Puzzle.assess_guess('spark', 'panda') == first
+        assert Puzzle.assessments.stats()['hits'] == 1
+    finally:
+        Puzzle.assessments = original
+
+def test_puzzle_word_length():
+    """Puzzles pick words of the requested length and reject guesses of other lengths"""
+    puzzle = Puzzle(vocab=['cat', 'chimp', 'dog'], word_length=3)
+    assert puzzle.word in ('cat', 'dog')
+    assert puzzle.word_length == 3
+    assert puzzle.assess('pig')[0] == WordleColor.BLACK
+    with pytest.raises(ValueError):
+        puzzle.assess('chimp')
+    with pytest.raises(ValueError):
+        Puzzle('chimp', word_length=4)
@@ -0,0 +1,70 @@
+import asyncio
+import concurrent.futures
+import json
+import pytest
+from solver.puzzle import Puzzle
+from solver.service import SolverService, serve_socket
+from solver.solver import InformationTheorySolver
+
+
+@pytest.fixture
+def service(lower_chimp_vocab):
+    return SolverService(InformationTheorySolver(lower_chimp_vocab, lower_chimp_vocab))
+
+def feedback(guess, answer):
+    return ''.join('byg'[color.value] for color in Puzzle.assess_guess(guess, answer))
+
+def play(service, answer):
+    history = []
+    while True:
+        response = service.next_guess(history)
+        if response['solved']:
+            return [guess for guess, _ in history]
+        history.append([response['guess'], feedback(response['guess'], answer)])
+
+def test_games_match_solver(service, lower_chimp_vocab):
+    for answer in lower_chimp_vocab:
+        assert play(service, answer) == service.solver.solve(Puzzle(word=answer))
+
+def test_next_guess(service):
+    assert service.next_guess([]) == {'guess': 'chimp', 'remaining': 5, 'solved': False}
+    assert service.next_guess([['CHIMP', 'YYBBB']]) == {'guess': 'hatch', 'remaining': 1, 'solved': False}
+    assert service.next_guess([['chimp', 'ggggg']])['solved']
+
+def test_bad_requests(service):
+    responses = [json.loads(service.handle_line(line)) for line in [
+        'not json',
+        '{"id": 1, "history": [["zzzzz", "bbbbb"]]}',
+        '{"id": 2, "history": [["chimp", "bbb"]]}',
+        '{"id": 3, "history": [["chimp", "bbbbb"]]}',
+        '{"id": 4, "history": "chimp"}',
+    ]]
+    assert [response['id'] for response in responses] == [None, 1, 2, 3, 4]
+    assert all('error' in response for response in responses)
+
+def test_concurrent_requests_match_serial(service, lower_chimp_vocab):
+    histories = [[['chimp', feedback('chimp', answer)]] for answer in lower_chimp_vocab] * 20
+    serial = [service.next_guess(history) for history in histories]
+    service.solver._guess_cache.clear()
+    with concurrent.futures.ThreadPoolExecutor(8) as executor:
+        assert list(executor.map(service.next_guess, histories)) == serial
+
+def test_unix_socket_round_trip(tmp_path, service):
+    path = str(tmp_path / 'service.sock')
+
+    async def exchange():
+        with concurrent.futures.ThreadPoolExecutor(2) as executor:
+            server = asyncio.ensure_future(serve_socket(service, executor, unix_path=path))
+            while not (tmp_path / 'service.sock').exists():
+                await asyncio.sleep(0.01)
+            reader, writer = await asyncio.open_unix_connection(path)
+            for request_id in range(3):
+                writer.write(json.dumps({'id': request_id, 'history': []}).encode('utf-8') + b'\n')
+            responses = [json.loads(await reader.readline()) for _ in range(3)]
+            writer.close()
+            server.cancel()
+            return responses
+
+    responses = asyncio.run(exchange())
+    assert sorted(response['id'] for response in responses) == [0, 1, 2]
+    assert all(response['guess'] == 'chimp' for response in responses)
@@ -2,16 +2,6 @@ import pytest
 from solver.solver import InformationTheorySolver
 from solver.puzzle import Puzzle
 
-@pytest.fixture
-def chimp_vocab():
-    return [
-        'CHIMP',
-        'CATCH',
-        'PATCH',
-        'MATCH',
-        'HATCH'
-    ]
-
 def test_info_theory_solver_chimp(chimp_vocab):
     """
     Tests functionality of information theory solver. For the word "chimp",
@@ -52,3 +42,71 @@ def test_info_theory_solver_match(chimp_vocab):
     guesses = info_theory_solver.solve(puzzle)
     assert puzzle.get_guess_count() == 2
     assert guesses == ['CHIMP', 'MATCH']
+
+def test_info_theory_solver_state_narrowing(chimp_vocab):
+    """Narrowing a state keeps only candidates consistent with the feedback"""
+    info_theory_solver = InformationTheorySolver(chimp_vocab, chimp_vocab)
+    pattern_matrix = info_theory_solver.pattern_matrix
+    state = info_theory_solver.initial_state()
+    assert len(state) == len(chimp_vocab)
+    guess_id = info_theory_solver.next_guess(state)
+    code = pattern_matrix.code('CHIMP', 'MATCH')
+    state = state.narrow(pattern_matrix, guess_id, code)
+    assert [pattern_matrix.answers[idx] for idx in state.candidate_ids] == ['MATCH']
+    assert state.guessed_ids == [guess_id]
+
+def test_info_theory_solver_reuses_states(chimp_vocab):
+    """Games reaching the same state should reuse the cached guess"""
+    vocab = chimp_vocab[1:]
+    info_theory_solver = InformationTheorySolver(vocab, vocab)
+    assert info_theory_solver.solve(Puzzle('PATCH')) == ['CATCH', 'PATCH']
+    assert len(info_theory_solver._guess_cache) == 1
+    # The state after 'CATCH' is shared, so only the state after 'PATCH' is new
+    assert info_theory_solver.solve(Puzzle('MATCH')) == ['CATCH', 'PATCH', 'MATCH']
+    assert len(info_theory_solver._guess_cache) == 2
+
+def test_info_theory_solver_pruning_keeps_guesses(chimp_vocab):
+    """Pruning the guess pool never changes the chosen guesses"""
+    pruned = InformationTheorySolver(chimp_vocab, chimp_vocab)
+    unpruned = InformationTheorySolver(chimp_vocab, chimp_vocab)
+    unpruned.prune_guess_pool = False
+    for word in chimp_vocab:
+        assert pruned.solve(Puzzle(word)) == unpruned.solve(Puzzle(word))
+
+def test_info_theory_solver_word_length(chimp_vocab):
+    """word_length narrows mixed-length word lists to one variant"""
+    vocab = chimp_vocab + ['CHIP', 'CHAT', 'PATH', 'MATH', 'CHIMPS']
+    info_theory_solver = InformationTheorySolver(vocab, vocab, word_length=4)
+    assert info_theory_solver.word_length == 4
+    assert info_theory_solver.pattern_matrix.guesses == ['CHIP', 'CHAT', 'PATH', 'MATH']
+    for word in ['CHIP', 'CHAT', 'PATH', 'MATH']:
+        assert info_theory_solver.solve(Puzzle(word))[-1] == word
+    with pytest.raises(ValueError):
+        InformationTheorySolver(vocab, vocab, word_length=7)
+
+def test_info_theory_solver_options_are_keyword_only(chimp_vocab):
+    """
+    Tests that the old positional pattern and information paths are rejected rather than
+    being taken as a cache path and a strategy tree.
+    """
+    with pytest.raises(TypeError):
+        InformationTheorySolver(chimp_vocab, chimp_vocab, 'patterns.npy', 'information.npy')
+
+def test_info_theory_solver_solve_many(chimp_vocab):
+    """Solving in lockstep gives every game exactly the guesses of solving it alone"""
+    info_theory_solver = InformationTheorySolver(chimp_vocab, chimp_vocab)
+    puzzles = [Puzzle(word) for word in chimp_vocab]
+    assert info_theory_solver.solve_many(puzzles) == \
+        [InformationTheorySolver(chimp_vocab, chimp_vocab).solve(Puzzle(word)) for word in chimp_vocab]
+    assert [puzzle.get_guess_count() for puzzle in puzzles] == [1, 2, 2, 2, 2]
+
+def test_info_theory_solver_memory_budget(chimp_vocab):
+    """Solvers without a cache only compute guesses x possible solutions, within their budget"""
+    vocab = chimp_vocab + ['CHIRP', 'PITCH']
+    unbounded = InformationTheorySolver(vocab, chimp_vocab)
+    bounded = InformationTheorySolver(vocab, chimp_vocab, memory_budget=10)
+    assert bounded.pattern_matrix.matrix.shape == (len(vocab), len(chimp_vocab))
+    assert bounded.pattern_matrix.matrix.cached_bytes == 0
+    for word in chimp_vocab:
+        assert bounded.solve(Puzzle(word)) == unbounded.solve(Puzzle(word))
+    assert bounded.pattern_matrix.matrix.cached_bytes <= 10
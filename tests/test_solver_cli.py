@@ -0,0 +1,59 @@
+import threading
+import solver.solver_cli as solver_cli
+from solver.solver_cli import SpeculativeRecommender, filter_vocab_on_guess_and_assessment
+from solver.wordle_color import WordleColor
+
+G, Y, B = WordleColor.GREEN, WordleColor.YELLOW, WordleColor.BLACK
+
+
+def test_speculation_matches_filtering(lower_chimp_vocab):
+    speculator = SpeculativeRecommender(recommend_fn=lambda words: (words[0], [(words[0], 1.0)]))
+    speculator.start(lower_chimp_vocab, 'catch')
+    speculator.cancel()
+    remaining, recommendation = speculator.lookup(lower_chimp_vocab, 'catch', (B, G, G, G, G))
+    assert remaining == filter_vocab_on_guess_and_assessment(lower_chimp_vocab, 'catch', (B, G, G, G, G))
+    assert recommendation == ('patch', [('patch', 1.0)])
+    # One word left, or none: nothing to recommend
+    assert speculator.lookup(lower_chimp_vocab, 'catch', (G, G, G, G, G)) == (['catch'], None)
+    assert speculator.lookup(lower_chimp_vocab, 'catch', (Y, Y, Y, Y, Y)) == ([], None)
+
+def test_speculation_ignores_other_states(lower_chimp_vocab):
+    speculator = SpeculativeRecommender(recommend_fn=lambda words: (words[0], []))
+    speculator.start(lower_chimp_vocab, 'catch')
+    assert speculator.lookup(lower_chimp_vocab, 'patch', (B, G, G, G, G)) is None
+    assert speculator.lookup(lower_chimp_vocab[1:], 'catch', (B, G, G, G, G)) is None
+    speculator.cancel()
+
+def test_lookup_cancels_pending_work():
+    vocab = ['catch', 'patch', 'match', 'hatch', 'chimp', 'chump']
+    started, release = threading.Event(), threading.Event()
+    calls = []
+    def slow_recommend(words):
+        calls.append(words)
+        started.set()
+        release.wait()
+        return words[0], []
+    speculator = SpeculativeRecommender(recommend_fn=slow_recommend)
+    speculator.start(vocab, 'catch')
+    started.wait()
+    threading.Timer(0.05, release.set).start()
+    # Waits for the largest bucket to finish, but the next one is never started
+    remaining, recommendation = speculator.lookup(vocab, 'catch', (G, B, B, B, Y))
+    assert remaining == ['chimp', 'chump']
+    assert recommendation is None
+    assert calls == [['patch', 'match', 'hatch']]
+
+def test_set_dictionary_word_length(tmp_path):
+    words = tmp_path / 'words.txt'
+    words.write_text('\n'.join(['chip', 'chat', 'path', 'math', 'chimp', 'catch']))
+    solver_cli.set_dictionary(words, words, word_length=4, cache_dir=tmp_path / 'caches')
+    try:
+        assert solver_cli.get_word_lists() == (['chip', 'chat', 'path', 'math'],) * 2
+        assert solver_cli.get_word_length() == 4
+        word, ranked_words = solver_cli.recommend(['chat', 'path', 'math'])
+        assert word in ('chat', 'path', 'math') and len(ranked_words) == 4
+        assert len(list((tmp_path / 'caches').glob('*.bin'))) == 1
+        # 'chat' gives path and math the same feedback; 'chip' tells all three apart
+        assert solver_cli.bucket_index(['chat', 'path', 'math'], ['chat', 'chip']).worst_case().tolist() == [2, 1]
+    finally:
+        solver_cli.set_dictionary()
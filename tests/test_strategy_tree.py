@@ -0,0 +1,76 @@
+import sys
+import numpy as np
+import pytest
+from solver.assess_solver import AssessSolver
+from solver.solver import InformationTheorySolver
+from solver.strategy_tree import (DEFAULT_TREE_PATH, build_strategy_tree, load_strategy_tree,
+                                  main, save_strategy_tree)
+
+
+@pytest.fixture
+def vocab():
+    return [
+        'CHIMP',
+        'CATCH',
+        'PATCH',
+        'MATCH',
+        'HATCH',
+        'LATCH',
+        'WATCH',
+        'BATCH'
+    ]
+
+def test_strategy_tree_matches_solver(vocab):
+    """Solving with the tree must give the same guesses as live computation"""
+    live_solver = InformationTheorySolver(vocab, vocab)
+    tree = build_strategy_tree(live_solver)
+    tree_solver = InformationTheorySolver(vocab, vocab, strategy_tree=tree)
+    assert AssessSolver(vocab).assess(tree_solver) == AssessSolver(vocab).assess(live_solver)
+    # Every decision came from the tree
+    assert not tree_solver._guess_cache
+
+def test_strategy_tree_round_trip(tmp_path, vocab):
+    tree = build_strategy_tree(InformationTheorySolver(vocab, vocab))
+    path = tmp_path / 'tree.npz'
+    save_strategy_tree(path, tree)
+    loaded = load_strategy_tree(path, vocab, vocab)
+    assert len(loaded) == len(tree)
+    assert np.array_equal(loaded.edges, tree.edges)
+    assert loaded.ranking(0) == tree.ranking(0)
+    assert loaded.children(0) == tree.children(0)
+
+def test_strategy_tree_lookup(vocab):
+    info_theory_solver = InformationTheorySolver(vocab, vocab)
+    tree = build_strategy_tree(info_theory_solver)
+    state = info_theory_solver.initial_state()
+    assert tree.lookup(state.candidate_ids) == 0
+    assert tree.guess(0) == info_theory_solver.next_guess(state)
+    # A state with a single candidate is never stored
+    assert tree.lookup([0]) is None
+
+def test_strategy_tree_other_word_lists(vocab):
+    tree = build_strategy_tree(InformationTheorySolver(vocab, vocab))
+    with pytest.raises(ValueError):
+        InformationTheorySolver(vocab[:-1], vocab[:-1], strategy_tree=tree)
+
+def test_rebuild_matches_packaged_tree(official_words, hidden_words):
+    """Pruned guess pools must not change the rankings or preferred guesses"""
+    info_theory_solver = InformationTheorySolver(official_words, hidden_words)
+    tree = build_strategy_tree(info_theory_solver)
+    packaged = load_strategy_tree(DEFAULT_TREE_PATH, info_theory_solver.pattern_matrix.guesses,
+                                  info_theory_solver.pattern_matrix.answers)
+    for field in ('digests', 'guesses', 'preferred', 'rankings', 'edges'):
+        assert np.array_equal(getattr(tree, field), getattr(packaged, field)), field
+    assert np.isfinite(tree.information).all()
+    assert np.allclose(tree.information, packaged.information)
+
+def test_main_uses_cache_dir(tmp_path, monkeypatch, vocab):
+    words_path = tmp_path / 'words.txt'
+    words_path.write_text('\n'.join(vocab))
+    out = tmp_path / 'tree.npz'
+    monkeypatch.setattr(sys, 'argv', [
+        'strategy_tree', '--official-words', str(words_path), '--hidden-words', str(words_path),
+        '--cache-dir', str(tmp_path / 'cache'), '--out', str(out)])
+    main()
+    assert len(load_strategy_tree(out)) == len(build_strategy_tree(InformationTheorySolver(vocab, vocab)))
+    assert list((tmp_path / 'cache').glob('*.bin'))